@@ -37,7 +37,7 @@ def get_all_users_trade_status(users: List[str], strategy: str = "archer_model")
     for user_id in users:
         try:
             rules = get_rules(user_id, strategy)
-            summary = get_trade_limit_summary(user_id, rules)
+            summary = get_trade_limit_summary(user_id, rules, fetch_when_unlimited=True)
 
             status_report["users"][user_id] = summary
 
@@ -205,7 +205,7 @@ def quick_status_check(users: List[str], strategy: str = "archer_model") -> None
     for user_id in users:
         try:
             rules = get_rules(user_id, strategy)
-            summary = get_trade_limit_summary(user_id, rules)
+            summary = get_trade_limit_summary(user_id, rules, fetch_when_unlimited=True)
 
             status = summary.get("status", "UNKNOWN")
             current = summary.get("current_count", 0)
@@ -0,0 +1,44 @@
+# app/demos/futures_demo.py
+"""
+Demo manual de create_trade (antes vivía en el bloque __main__ de app/futures.py).
+Coloca una orden REAL: usar solo con USE_BINANCE_TESTNET=true.
+
+Uso:
+    export USE_BINANCE_TESTNET=true
+    python -m app.demos.futures_demo
+"""
+
+from app.futures import create_trade
+from app.utils.binance.binance_client import get_binance_client_for_user
+from app.utils.binance.utils import get_mark_price
+
+from app.utils.logger_config import get_logger
+logger = get_logger()
+
+
+if __name__ == "__main__":
+    symbol = "BTCUSDT"
+    user_id = "futures"
+    strategy = "archer_model"
+    client = get_binance_client_for_user(user_id)
+
+    entry_price = get_mark_price(symbol, client)            # puedes ajustar a precio real
+    target_price = entry_price * 1.05
+    stop_loss = entry_price * 0.95
+    direction = "BUY"
+    rr = 1.0
+    probability = 75
+    rules = {
+        "min_rr": 1.0,
+        "risk_pct": 3.5,
+        "max_leverage": 125
+    }
+
+    # imprime la información de la orden
+    logger.info(f"Creando orden para {symbol}...")
+    logger.info(f"Entry Price: {entry_price}, Stop Loss: {stop_loss}, Target Price: {target_price}")
+    logger.info(f"Direction: {direction}, RR: {rr}, Probability: {probability}")
+    logger.info(f"Rules: {rules}")
+
+    create_trade(symbol, entry_price, stop_loss, target_price, direction, rr, probability, rules,
+                 client, user_id, strategy)
@@ -3,6 +3,7 @@ import sys
 import os
 import time
 from decimal import Decimal
+from typing import Optional
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app.utils.logger_config import get_logger
@@ -867,16 +868,20 @@ def adjust_tp_only_for_open_position(symbol: str, new_target: float, client, use
         return {"success": False, "error": f"adjust_tp_only failed: {e}"}
 
 
-def half_close_and_move_be(symbol: str, client, user_id: str) -> dict:
+def half_close_and_move_be(symbol: str, client, user_id: str, pos_cached: Optional[list] = None) -> dict:
     """
     1) Close 50% of the current position (reduceOnly MARKET).
     2) Move the remaining position's Stop Loss to Break-Even (entryPrice).
+
+    Args:
+        pos_cached: Optional result of futures_position_information(symbol=...) already
+            fetched by the caller. If provided, the initial position query is skipped.
     """
     try:
         sym = symbol.upper()
 
-        # --- Read current position ---
-        pos = client.futures_position_information(symbol=sym)
+        # --- Read current position (reuse caller's snapshot when available) ---
+        pos = pos_cached if pos_cached is not None else client.futures_position_information(symbol=sym)
         if not pos or float(pos[0].get("positionAmt", "0")) == 0.0:
             return {"success": False, "error": "No open position to half-close"}
 
@@ -900,28 +905,42 @@ def half_close_and_move_be(symbol: str, client, user_id: str) -> dict:
             return {"success": False, "error": "Half qty rounded to zero"}
 
         # --- Send reduceOnly MARKET to close half ---
+        # RESULT: la respuesta trae status/executedQty finales (con el ACK por defecto executedQty es "0")
         reduce_side = "SELL" if position_amt > 0 else "BUY"
         resp = client.futures_create_order(
             symbol=sym,
             side=reduce_side,
             type="MARKET",
             quantity=qty_half,
-            reduceOnly=True
+            reduceOnly=True,
+            newOrderRespType="RESULT"
         )
 
-        # --- Re-check remaining position ---
-        pos2 = client.futures_position_information(symbol=sym)
-        if not pos2:
-            return {"success": False, "error": "Position info not available after half-close"}
-        remaining_amt = float(pos2[0].get("positionAmt", "0"))
+        # --- Remaining position ---
+        # Si la orden se llenó completa, el restante se calcula localmente (ahorra un RTT).
+        # Un cierre reduceOnly no modifica el entryPrice en Binance, así que be_price_raw sigue vigente.
+        # Solo si el fill es parcial/desconocido se re-consulta la posición.
+        executed_qty = float(resp.get("executedQty", 0) or 0) if resp else 0.0
+        orig_qty = float(resp.get("origQty", 0) or 0) if resp else 0.0
+        fully_filled = resp is not None and resp.get("status") == "FILLED" and orig_qty > 0 and executed_qty == orig_qty
+
+        if fully_filled:
+            remaining_amt = position_amt - (qty_half if position_amt > 0 else -qty_half)
+            be_price = be_price_raw
+        else:
+            pos2 = client.futures_position_information(symbol=sym)
+            if not pos2:
+                return {"success": False, "error": "Position info not available after half-close"}
+            remaining_amt = float(pos2[0].get("positionAmt", "0"))
+            # Use the updated entryPrice if exchange recalculated it after partial close
+            be_price = float(pos2[0].get("entryPrice", be_price_raw) or be_price_raw)
+
         if abs(remaining_amt) < 1e-12:
             # Fully closed after rounding or partial execution
             cancel_orphan_orders(sym, client, user_id)
             return {"success": True, "message": "Half-close done and position fully closed"}
 
         # --- Compute BE stop for the remaining position ---
-        # Use the updated entryPrice if exchange recalculated it after partial close
-        be_price = float(pos2[0].get("entryPrice", be_price_raw) or be_price_raw)
         tick = Decimal(str(filters["PRICE_FILTER"]["tickSize"]))
         be_price_dec = Decimal(str(be_price))
 
@@ -1141,29 +1160,3 @@ def cancel_tp_only(symbol: str, client, user_id: str) -> dict:
 
     except Exception as e:
         return {"success": False, "error": f"cancel_tp_only failed: {e}"}
-
-
-if __name__ == "__main__":
-    symbol = "BTCUSDT"
-    entry_price = get_mark_price(symbol)            # puedes ajustar a precio real
-    target_price = entry_price * 1.05
-    stop_loss = entry_price * 0.95
-    direction = "BUY"
-    rr = 1.0
-    probability = 75
-    rules = {
-        "min_rr": 1.0,
-        "risk_pct": 3.5,
-        "max_leverage": 125
-    }
-
-    # imprime la información de la orden
-    logger.info(f"Creando orden para {symbol}...")
-    logger.info(f"Entry Price: {entry_price}, Stop Loss: {stop_loss}, Target Price: {target_price}")
-    logger.info(f"Direction: {direction}, RR: {rr}, Probability: {probability}")
-    logger.info(f"Rules: {rules}")
-
-    """
-    symbol, entry_price, stop_loss, target_price, direction, rr, probability, rules
-    """
-    create_trade(symbol, entry_price, stop_loss, target_price, direction, rr, probability, rules)
@@ -1,35 +1,67 @@
 # app/market_validation.py
 
+import math
 import time
+from bisect import bisect_right
+from enum import IntEnum
 from typing import Dict, Any, Tuple, Optional
-from app.utils.binance.binance_client import get_binance_client_for_user
+from app.utils.binance.binance_client import get_public_binance_client
 
 from app.utils.logger_config import get_logger
 logger = get_logger()
 
+# Bandas de drift (%) con scenarios pre-calculados: [0.4, 0.6] -> 0.5%, [0.8, 1.2] -> 1%.
+# Los límites superiores se desplazan un ulp para que bisect_right los trate como inclusivos.
+_SCENARIO_BINS = (0.4, math.nextafter(0.6, math.inf), 0.8, math.nextafter(1.2, math.inf))
+_SCENARIO_KEYS_UP = (None, "if_price_up_0_5_pct", None, "if_price_up_1_pct", None)
+_SCENARIO_KEYS_DOWN = (None, "if_price_down_0_5_pct", None, "if_price_down_1_pct", None)
+
+# Umbrales de frescura por acción (segundos / %)
+CLOSE_MAX_STALE_SEC: float = 60.0
+CLOSE_WARN_DRIFT_PCT: float = 2.0
+ADJUST_MAX_STALE_SEC: float = 45.0
+HALF_CLOSE_MAX_STALE_SEC: float = 90.0
+
+
+class ReasonCode(IntEnum):
+    """Resultado estructurado de validate_guardian_decision_freshness (el string queda solo para logs)"""
+    NO_PRICE_DATA = 0
+    CLOSE_VALIDATED = 1
+    CLOSE_TOO_STALE = 2
+    ADJUST_VALIDATED = 3
+    ADJUST_RECALCULATED = 4
+    ADJUST_DRIFT_TOO_HIGH = 5
+    ADJUST_TOO_STALE = 6
+    HALF_CLOSE_VALIDATED = 7
+    HALF_CLOSE_VALIDATED_LEGACY = 8
+    HALF_CLOSE_TOO_STALE = 9
+    HALF_CLOSE_NO_PROFIT = 10
+    UNKNOWN_ACTION = 11
+    VALIDATION_ERROR = 12
+
 
 def get_fresh_market_data(symbol: str, user_id: str) -> Dict[str, Any]:
     """
     Obtiene datos frescos de mercado para validación usando cache cuando sea posible.
     Fallback a API si cache no disponible.
+
+    Solo consume endpoints públicos, por lo que usa el cliente compartido
+    (user_id se mantiene por compatibilidad de firma).
     """
     try:
         from app.utils.binance.binance_cache_client import get_binance_cache_client
         from app.utils.binance.utils import get_mark_price
 
-        client = get_binance_client_for_user(user_id)
+        client = get_public_binance_client()
         cache_client = get_binance_cache_client()
 
         # Mark price con cache (30s TTL)
         mark_price = get_mark_price(symbol.upper(), client)
 
-        # Orderbook liviano con cache (30s TTL)
-        orderbook_data = cache_client.get_orderbook_data(symbol.upper(), depth_limit=20, client=client, max_age=30)
-        if orderbook_data and "bids" in orderbook_data and "asks" in orderbook_data:
-            orderbook = orderbook_data
-        else:
-            # Fallback a API
-            orderbook = client.futures_order_book(symbol=symbol.upper(), limit=20)
+        # Top of book con cache (30s TTL): WebSocket cache -> bookTicker cache -> API bookTicker
+        orderbook = cache_client.get_book_ticker(symbol.upper(), client=client, max_age=30)
+        if not orderbook:
+            raise ValueError("bookTicker not available")
 
         # ✅ OPTIMIZACIÓN: Usar métricas pre-calculadas del cache cuando estén disponibles
         data_source = orderbook.get("source", "api_fallback")
@@ -62,12 +94,15 @@ def get_fresh_market_data(symbol: str, user_id: str) -> Dict[str, Any]:
             logger.debug(f"✅ Market data from cache (optimized): {symbol}, spread={spread_pct:.4f}%")
             return result
         else:
-            # Fallback: Cálculo manual tradicional
-            best_bid = float(orderbook["bids"][0][0]) if orderbook["bids"] else 0
-            best_ask = float(orderbook["asks"][0][0]) if orderbook["asks"] else 0
+            # Fallback: spread a partir de best bid/ask del bookTicker
+            best_bid = float(orderbook.get("best_bid", 0))
+            best_ask = float(orderbook.get("best_ask", 0))
             spread_pct = ((best_ask - best_bid) / best_ask * 100) if best_ask > 0 else 0
 
-            logger.warning(f"⚠️ Market data from API fallback: {symbol}, spread={spread_pct:.4f}%")
+            if data_source == "api_fallback":
+                logger.warning(f"⚠️ Market data from bookTicker API fallback: {symbol}, spread={spread_pct:.4f}%")
+            else:
+                logger.debug(f"✅ Market data from bookTicker ({data_source}): {symbol}, spread={spread_pct:.4f}%")
             return {
                 "mark_price": mark_price,
                 "best_bid": best_bid,
@@ -88,41 +123,43 @@ def get_fresh_market_data(symbol: str, user_id: str) -> Dict[str, Any]:
 
 
 def validate_guardian_decision_freshness(message: Dict[str, Any],
-                                       fresh_data: Dict[str, Any]) -> Tuple[bool, str, Dict[str, Any]]:
+                                       fresh_data: Dict[str, Any]) -> Tuple[bool, ReasonCode, str, Dict[str, Any]]:
     """
     Valida si la decisión del guardian sigue siendo válida con datos frescos
 
     Returns:
-        Tuple[bool, str, Dict]: (is_valid, reason, adjusted_params)
+        Tuple[bool, ReasonCode, str, Dict]: (is_valid, reason_code, reason, adjusted_params)
     """
     try:
         market_context = message.get("market_context", {})
         action = message.get("action", "").lower()
 
-        trigger_price = market_context.get("trigger_price", 0)
-        trigger_timestamp = market_context.get("timestamp", 0)
-        max_drift_pct = message.get("price_scenarios", {}).get("max_acceptable_drift_pct", 1.0)
+        # Normalizar a float una sola vez: el resto de la función es aritmética pura
+        trigger_price: float = float(market_context.get("trigger_price", 0) or 0)
+        trigger_timestamp: float = float(market_context.get("timestamp", 0) or 0)
+        max_drift_pct: float = float(message.get("price_scenarios", {}).get("max_acceptable_drift_pct", 1.0))
 
-        current_price = fresh_data.get("mark_price", 0)
-        current_timestamp = fresh_data.get("timestamp", time.time())
+        current_price: float = float(fresh_data.get("mark_price", 0) or 0)
+        # Evitar llamar time.time() cuando fresh_data ya trae timestamp
+        current_timestamp: float = fresh_data["timestamp"] if "timestamp" in fresh_data else time.time()
 
         if trigger_price == 0 or current_price == 0:
-            return True, "no_price_data_for_validation", {}
+            return True, ReasonCode.NO_PRICE_DATA, "no_price_data_for_validation", {}
 
         # Calcular drifts
         price_drift_pct = abs(current_price - trigger_price) / trigger_price * 100
         time_drift_sec = current_timestamp - trigger_timestamp
 
-        logger.debug(f"🔍 Validation: price_drift={price_drift_pct:.3f}%, time_drift={time_drift_sec:.1f}s")
+        logger.debug("🔍 Validation: price_drift=%.3f%%, time_drift=%.1fs", price_drift_pct, time_drift_sec)
 
         # Validaciones específicas por tipo de acción
         if action == "close":
             # CLOSE: más tolerante a price drift, urgencia alta
-            if time_drift_sec > 60:  # >1 minuto = muy stale
-                return False, f"close_too_stale_{time_drift_sec:.1f}s", {}
-            if price_drift_pct > 2.0:  # >2% cambio de precio
+            if time_drift_sec > CLOSE_MAX_STALE_SEC:  # >1 minuto = muy stale
+                return False, ReasonCode.CLOSE_TOO_STALE, f"close_too_stale_{time_drift_sec:.1f}s", {}
+            if price_drift_pct > CLOSE_WARN_DRIFT_PCT:  # >2% cambio de precio
                 logger.warning(f"⚠️ Significant price drift for CLOSE, but still executing: {price_drift_pct:.3f}%")
-            return True, "close_validated", {}
+            return True, ReasonCode.CLOSE_VALIDATED, "close_validated", {}
 
         elif action == "adjust":
             # ADJUST: recalcular stop si precio drifted
@@ -130,14 +167,14 @@ def validate_guardian_decision_freshness(message: Dict[str, Any],
                 # Usar pre-calculated scenarios
                 adjusted_stop = get_adjusted_stop_from_scenarios(message, current_price, trigger_price)
                 if adjusted_stop:
-                    return True, f"stop_recalculated_drift_{price_drift_pct:.3f}%", {"stop": adjusted_stop}
+                    return True, ReasonCode.ADJUST_RECALCULATED, f"stop_recalculated_drift_{price_drift_pct:.3f}%", {"stop": adjusted_stop}
                 else:
-                    return False, f"adjust_drift_too_high_{price_drift_pct:.3f}%", {}
+                    return False, ReasonCode.ADJUST_DRIFT_TOO_HIGH, f"adjust_drift_too_high_{price_drift_pct:.3f}%", {}
 
-            if time_drift_sec > 45:  # >45s para adjust
-                return False, f"adjust_too_stale_{time_drift_sec:.1f}s", {}
+            if time_drift_sec > ADJUST_MAX_STALE_SEC:  # >45s para adjust
+                return False, ReasonCode.ADJUST_TOO_STALE, f"adjust_too_stale_{time_drift_sec:.1f}s", {}
 
-            return True, "adjust_validated", {}
+            return True, ReasonCode.ADJUST_VALIDATED, "adjust_validated", {}
 
         elif action == "half_close":
             # HALF_CLOSE: Validación MÍNIMA - solo verificar que el trade sigue en profit
@@ -145,8 +182,8 @@ def validate_guardian_decision_freshness(message: Dict[str, Any],
             # Aquí solo nos aseguramos que no esté en pérdida
 
             # Validación de tiempo: más tolerante (90 segundos)
-            if time_drift_sec > 90:
-                return False, f"half_close_too_stale_{time_drift_sec:.1f}s", {}
+            if time_drift_sec > HALF_CLOSE_MAX_STALE_SEC:
+                return False, ReasonCode.HALF_CLOSE_TOO_STALE, f"half_close_too_stale_{time_drift_sec:.1f}s", {}
 
             # Obtener entry y side del mensaje para validar profit
             entry = message.get("entry", 0)
@@ -155,29 +192,29 @@ def validate_guardian_decision_freshness(message: Dict[str, Any],
             if not entry or not side:
                 # Sin datos de entry/side, permitir ejecución (backward compatibility)
                 logger.warning("⚠️ Half-close without entry/side, allowing execution (legacy)")
-                return True, "half_close_validated_legacy", {}
+                return True, ReasonCode.HALF_CLOSE_VALIDATED_LEGACY, "half_close_validated_legacy", {}
 
             # Validar que el trade sigue en profit (no importa si retrocedió del 50% al 40%)
             if side == "BUY":
                 if current_price <= entry:
-                    return False, f"half_close_no_profit_buy_price_{current_price:.6f}_entry_{entry:.6f}", {}
+                    return False, ReasonCode.HALF_CLOSE_NO_PROFIT, f"half_close_no_profit_buy_price_{current_price:.6f}_entry_{entry:.6f}", {}
                 profit_pct = ((current_price - entry) / entry) * 100
                 logger.info(f"✅ Half-close BUY validated: price={current_price:.6f}, entry={entry:.6f}, profit={profit_pct:.3f}%")
 
             else:  # SELL
                 if current_price >= entry:
-                    return False, f"half_close_no_profit_sell_price_{current_price:.6f}_entry_{entry:.6f}", {}
+                    return False, ReasonCode.HALF_CLOSE_NO_PROFIT, f"half_close_no_profit_sell_price_{current_price:.6f}_entry_{entry:.6f}", {}
                 profit_pct = ((entry - current_price) / entry) * 100
                 logger.info(f"✅ Half-close SELL validated: price={current_price:.6f}, entry={entry:.6f}, profit={profit_pct:.3f}%")
 
-            return True, "half_close_validated", {}
+            return True, ReasonCode.HALF_CLOSE_VALIDATED, "half_close_validated", {}
 
         else:
-            return True, "unknown_action_defaulted", {}
+            return True, ReasonCode.UNKNOWN_ACTION, "unknown_action_defaulted", {}
 
     except Exception as e:
         logger.error(f"❌ Error validating guardian decision: {e}")
-        return True, f"validation_error_{str(e)}", {}  # Default to allow execution
+        return True, ReasonCode.VALIDATION_ERROR, f"validation_error_{str(e)}", {}  # Default to allow execution
 
 
 def get_adjusted_stop_from_scenarios(message: Dict[str, Any], current_price: float,
@@ -192,58 +229,15 @@ def get_adjusted_stop_from_scenarios(message: Dict[str, Any], current_price: flo
         if original_stop == 0:
             return None
 
-        # Determinar qué scenario usar basado en price drift
+        # Determinar qué scenario usar basado en price drift (una búsqueda binaria + un dict get)
         price_change_pct = (current_price - trigger_price) / trigger_price * 100
 
-        if 0.4 <= abs(price_change_pct) <= 0.6:
-            # Usar scenario 0.5%
-            if price_change_pct > 0:
-                return scenarios.get("if_price_up_0_5_pct", original_stop)
-            else:
-                return scenarios.get("if_price_down_0_5_pct", original_stop)
-
-        elif 0.8 <= abs(price_change_pct) <= 1.2:
-            # Usar scenario 1%
-            if price_change_pct > 0:
-                return scenarios.get("if_price_up_1_pct", original_stop)
-            else:
-                return scenarios.get("if_price_down_1_pct", original_stop)
+        idx = bisect_right(_SCENARIO_BINS, abs(price_change_pct))
+        key = (_SCENARIO_KEYS_UP if price_change_pct > 0 else _SCENARIO_KEYS_DOWN)[idx]
 
-        else:
-            # Fuera de scenarios pre-calculados, usar original
-            return original_stop
+        # Fuera de scenarios pre-calculados, usar original
+        return scenarios.get(key, original_stop) if key else original_stop
 
     except Exception as e:
         logger.error(f"❌ Error getting adjusted stop from scenarios: {e}")
         return None
-
-
-def should_proceed_with_execution(action: str, validation_result: Tuple[bool, str, Dict]) -> bool:
-    """
-    Determina si se debe proceder con la ejecución basado en validación
-    """
-    is_valid, reason, adjusted_params = validation_result
-
-    if is_valid:
-        return True
-
-    # Reglas especiales para casos edge
-    if action == "close":
-        # CLOSE siempre ejecuta salvo casos extremos
-        if "too_stale" in reason and "60" in reason:  # >60s stale
-            return False
-        return True  # Execute close even with some drift
-
-    elif action == "adjust":
-        # ADJUST solo si se puede recalcular o drift es menor
-        if "recalculated" in reason:
-            return True
-        if "too_high" in reason:
-            return False
-        return True
-
-    elif action == "half_close":
-        # HALF_CLOSE moderadamente estricto
-        return False  # Si no válida, no ejecutar
-
-    return is_valid
\ No newline at end of file
@@ -12,8 +12,10 @@ from app.futures import (
     half_close_and_move_be
 )
 from app.utils.binance.binance_client import get_binance_client_for_user
+from app.utils.binance.binance_fetch import get_position_cached
 from app.utils.db.query_executor import get_rules
 from app.market_validation import get_fresh_market_data, validate_guardian_decision_freshness
+from app.trade_limits import invalidate_user_cache
 
 
 def execute_guardian_action_for_user(user_id: str, symbol: str, action: str,
@@ -58,11 +60,15 @@ def execute_guardian_action_for_user(user_id: str, symbol: str, action: str,
             }
 
         symbol_upper = symbol.upper()
-        execution_start = time.time()
+        # Duraciones con reloj monotónico (inmune a saltos NTP); time.time() solo para timestamps
+        mono_start = time.monotonic()
 
         # Ejecutar según tipo de acción
         if action == "close":
-            result = close_position_and_cancel_orders(symbol_upper, client, user_id)
+            try:
+                result = close_position_and_cancel_orders(symbol_upper, client, user_id)
+            finally:
+                invalidate_user_cache(user_id)
             action_type = "CLOSE"
 
         elif action == "adjust":
@@ -85,7 +91,12 @@ def execute_guardian_action_for_user(user_id: str, symbol: str, action: str,
             action_type = "ADJUST"
 
         elif action == "half_close":
-            result = half_close_and_move_be(symbol_upper, client, user_id)
+            # Snapshot de la posición (retry + coalescing): half_close_and_move_be no la vuelve a pedir
+            pos_cached = get_position_cached(symbol_upper, client, user_id)
+            try:
+                result = half_close_and_move_be(symbol_upper, client, user_id, pos_cached=pos_cached)
+            finally:
+                invalidate_user_cache(user_id)
             action_type = "HALF_CLOSE"
 
         else:
@@ -96,8 +107,7 @@ def execute_guardian_action_for_user(user_id: str, symbol: str, action: str,
                 "timestamp": time.time()
             }
 
-        execution_end = time.time()
-        execution_time = execution_end - execution_start
+        execution_time = time.monotonic() - mono_start
 
         # Procesar resultado
         success = result.get("success", False)
@@ -110,7 +120,7 @@ def execute_guardian_action_for_user(user_id: str, symbol: str, action: str,
             "execution_time_sec": round(execution_time, 3),
             "result": result,
             "market_price_at_execution": fresh_market_data.get("mark_price") if fresh_market_data else None,
-            "timestamp": execution_end,
+            "timestamp": time.time(),
             "reason": "executed_successfully" if success else f"execution_failed_{error_msg}"
         }
 
@@ -191,7 +201,7 @@ def execute_adjust_sequential(users: List[str], symbol: str, message: Dict[str,
             fresh_data = get_fresh_market_data(symbol, user_id)
 
             # Validar decisión con datos frescos
-            is_valid, reason, adjusted_params = validate_guardian_decision_freshness(message, fresh_data)
+            is_valid, _reason_code, reason, adjusted_params = validate_guardian_decision_freshness(message, fresh_data)
 
             if not is_valid:
                 result = {
@@ -242,7 +252,7 @@ def execute_half_close_sequential(users: List[str], symbol: str, message: Dict[s
 
             # Datos frescos y validación
             fresh_data = get_fresh_market_data(symbol, user_id)
-            is_valid, reason, adjusted_params = validate_guardian_decision_freshness(message, fresh_data)
+            is_valid, _reason_code, reason, adjusted_params = validate_guardian_decision_freshness(message, fresh_data)
 
             if not is_valid:
                 result = {
@@ -284,7 +294,7 @@ def execute_multi_user_guardian_action(users: List[str], symbol: str,
     Orchestrador principal para ejecución multi-usuario optimizada
     """
     action = message.get("action", "").lower()
-    execution_start = time.time()
+    mono_start = time.monotonic()
 
     logger.info(f"🛡️ Guardian multi-user execution: {action.upper()} for {symbol} across {len(users)} users")
 
@@ -310,8 +320,7 @@ def execute_multi_user_guardian_action(users: List[str], symbol: str,
             "timestamp": time.time()
         } for user_id in users]
 
-    execution_end = time.time()
-    total_execution_time = execution_end - execution_start
+    total_execution_time = time.monotonic() - mono_start
 
     # Compilar estadísticas
     successful_executions = [r for r in results if r.get("success", False)]
@@ -326,7 +335,7 @@ def execute_multi_user_guardian_action(users: List[str], symbol: str,
         "success_rate": len(successful_executions) / len(users) * 100 if users else 0,
         "total_execution_time_sec": round(total_execution_time, 3),
         "results": results,
-        "timestamp": execution_end
+        "timestamp": time.time()
     }
 
     # Log final
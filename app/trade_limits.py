@@ -1,11 +1,74 @@
 # app/trade_limits.py
 
-from typing import Dict, Tuple, List
+import os
+import threading
+import time
+from operator import itemgetter
+from typing import Dict, Tuple, List, Optional, FrozenSet
 from app.utils.binance.binance_client import get_binance_client_for_user
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Cache por usuario de posiciones/órdenes abiertas (evita repetir la misma llamada a Binance
+# dentro de un mismo flujo check -> summary -> log). Entradas: {user_id: (monotonic_ts, (count, symbols, symbol_set))}
+TRADE_LIMITS_CACHE_TTL = float(os.environ.get("TRADE_LIMITS_CACHE_TTL", "10"))
+
+_POS_CACHE: Dict[str, Tuple[float, Tuple[int, List[str], FrozenSet[str]]]] = {}
+_ORD_CACHE: Dict[str, Tuple[float, Tuple[int, List[str], FrozenSet[str]]]] = {}
+# Generación por usuario: invalidate_user_cache la incrementa, y un fetch que empezó antes
+# de la invalidación no puede volver a poblar el cache con datos viejos
+_CACHE_GENERATION: Dict[str, int] = {}
+_cache_lock = threading.RLock()
+
+
+# Binance siempre incluye "symbol" en posiciones y órdenes
+_get_symbol = itemgetter("symbol")
+
+
+def _cache_generation(user_id: str) -> int:
+    with _cache_lock:
+        return _CACHE_GENERATION.get(user_id, 0)
+
+
+def _cache_get(cache: Dict, user_id: str):
+    with _cache_lock:
+        entry = cache.get(user_id)
+    if entry is not None and time.monotonic() - entry[0] < TRADE_LIMITS_CACHE_TTL:
+        return entry[1]
+    return None
+
+
+def _cache_put(cache: Dict, user_id: str, generation: int, value: Tuple[int, List[str], FrozenSet[str]]):
+    """Guarda el resultado solo si no hubo invalidación desde que empezó el fetch"""
+    with _cache_lock:
+        if _CACHE_GENERATION.get(user_id, 0) == generation:
+            cache[user_id] = (time.monotonic(), value)
+
+
+def invalidate_user_cache(user_id: str):
+    """
+    Invalida el cache de posiciones/órdenes de un usuario.
+    Llamar después de abrir/cerrar trades para que el cambio sea visible inmediatamente.
+    """
+    with _cache_lock:
+        _CACHE_GENERATION[user_id] = _CACHE_GENERATION.get(user_id, 0) + 1
+        _POS_CACHE.pop(user_id, None)
+        _ORD_CACHE.pop(user_id, None)
+
+
+_TRUE_STRINGS = frozenset({'true', '1', 'yes', 'on'})
+
+
+def _parse_bool(raw_value) -> bool:
+    if isinstance(raw_value, str):
+        return raw_value.lower() in _TRUE_STRINGS
+    return bool(raw_value)
+
+
+# Parser por tipo para parse_rule_value (tipo desconocido -> str)
+_RULE_PARSERS = {int: int, float: float, bool: _parse_bool, str: str}
+
 
 def parse_rule_value(rules: Dict, rule_name: str, default_value=None, value_type=str):
     """
@@ -25,66 +88,127 @@ def parse_rule_value(rules: Dict, rule_name: str, default_value=None, value_type
         if raw_value is None:
             return default_value
 
-        if value_type == int:
-            return int(raw_value)
-        elif value_type == float:
-            return float(raw_value)
-        elif value_type == bool:
-            if isinstance(raw_value, str):
-                return raw_value.lower() in ('true', '1', 'yes', 'on')
-            return bool(raw_value)
-        else:
-            return str(raw_value)
+        return _RULE_PARSERS.get(value_type, str)(raw_value)
 
     except (ValueError, TypeError) as e:
-        logger.warning(f"Error parsing rule {rule_name} with value {raw_value}: {e}")
+        logger.warning("Error parsing rule %s with value %r: %s", rule_name, raw_value, e)
         return default_value
 
 
-def get_open_positions_count(user_id: str) -> Tuple[int, List[str]]:
+def _is_nonzero_amount(amount) -> bool:
+    """
+    True si positionAmt != 0. Binance devuelve una fila por símbolo (casi todas "0.000"),
+    así que los strings se evalúan sin float(): un cero es solo '0', '.' y signo.
+    """
+    if isinstance(amount, str):
+        return bool(amount.strip("+-0."))
+    return float(amount or 0) != 0.0
+
+
+def get_open_positions_count(user_id: str, client=None) -> Tuple[int, List[str], FrozenSet[str]]:
     """
     Obtiene el número de posiciones abiertas para un usuario
+    (cacheado por TRADE_LIMITS_CACHE_TTL segundos)
 
     Returns:
-        Tuple[int, List[str]]: (count, list_of_symbols)
+        Tuple[int, List[str], FrozenSet[str]]: (count, list_of_symbols, symbol_set) - símbolos siempre en MAYÚSCULAS
     """
+    cached = _cache_get(_POS_CACHE, user_id)
+    if cached is not None:
+        return cached
+
+    generation = _cache_generation(user_id)
     try:
-        client = get_binance_client_for_user(user_id)
+        client = client or get_binance_client_for_user(user_id)
         positions = client.futures_position_information()
 
-        open_positions = []
-        for pos in positions:
-            position_amt = float(pos.get("positionAmt", "0"))
-            if abs(position_amt) > 0:
-                symbol = pos.get("symbol", "")
-                open_positions.append(symbol)
+        open_positions = [
+            _get_symbol(pos).upper()
+            for pos in positions
+            if _is_nonzero_amount(pos.get("positionAmt", "0"))
+        ]
 
-        return len(open_positions), open_positions
+        result = (len(open_positions), open_positions, frozenset(open_positions))
+        _cache_put(_POS_CACHE, user_id, generation, result)
+        return result
 
-    except Exception as e:
-        logger.error(f"Error getting open positions for {user_id}: {e}")
-        return 0, []
+    except Exception:
+        logger.exception("Error getting open positions for %s", user_id)
+        return 0, [], frozenset()
 
 
-def get_open_orders_count(user_id: str) -> Tuple[int, List[str]]:
+def get_open_orders_count(user_id: str, client=None) -> Tuple[int, List[str], FrozenSet[str]]:
     """
     Obtiene el número de órdenes abiertas para un usuario
     (útil si se quiere contar pending orders en lugar de positions)
+    (cacheado por TRADE_LIMITS_CACHE_TTL segundos)
 
     Returns:
-        Tuple[int, List[str]]: (count, list_of_symbols)
+        Tuple[int, List[str], FrozenSet[str]]: (count, list_of_symbols, symbol_set) - símbolos siempre en MAYÚSCULAS
     """
+    cached = _cache_get(_ORD_CACHE, user_id)
+    if cached is not None:
+        return cached
+
+    generation = _cache_generation(user_id)
     try:
-        client = get_binance_client_for_user(user_id)
+        client = client or get_binance_client_for_user(user_id)
         orders = client.futures_get_open_orders()
 
-        symbols_with_orders = list(set([order.get("symbol", "") for order in orders]))
+        symbols_with_orders = list({symbol.upper() for symbol in map(_get_symbol, orders)})
 
-        return len(symbols_with_orders), symbols_with_orders
+        result = (len(symbols_with_orders), symbols_with_orders, frozenset(symbols_with_orders))
+        _cache_put(_ORD_CACHE, user_id, generation, result)
+        return result
 
-    except Exception as e:
-        logger.error(f"Error getting open orders for {user_id}: {e}")
-        return 0, []
+    except Exception:
+        logger.exception("Error getting open orders for %s", user_id)
+        return 0, [], frozenset()
+
+
+def _parse_limit_rules(rules: Dict) -> Tuple[int, str]:
+    """Parsea una sola vez (max_trades_open, count_method) de las rules"""
+    return (
+        parse_rule_value(rules, "max_trades_open", 999, int),
+        parse_rule_value(rules, "count_method", "positions", str)
+    )
+
+
+def _fetch_open_count(user_id: str, count_method: str) -> Tuple[int, List[str], FrozenSet[str]]:
+    """Conteo actual según count_method ("orders" o posiciones por defecto)"""
+    if count_method == "orders":
+        return get_open_orders_count(user_id)
+    return get_open_positions_count(user_id)
+
+
+def _compute_summary_from(user_id: str, max_trades: int, count_method: str,
+                          current_count: int, current_list: List[str]) -> Dict:
+    """
+    Construye el resumen de límites a partir de un conteo ya obtenido (sin llamadas a Binance)
+    """
+    if max_trades < 999:
+        remaining_slots = max(0, max_trades - current_count)
+        # max_trades <= 0 significa "ningún trade permitido": 100% utilizado
+        utilization_pct = round(current_count / max_trades * 100, 1) if max_trades > 0 else 100.0
+        is_at_limit = current_count >= max_trades
+    else:
+        remaining_slots = 999
+        utilization_pct = 0
+        is_at_limit = False
+
+    status = "AT_LIMIT" if is_at_limit else "NEAR_LIMIT" if utilization_pct > 80 else "NORMAL"
+
+    return {
+        "user_id": user_id,
+        "max_trades_configured": max_trades,
+        "current_count": current_count,
+        "remaining_slots": remaining_slots,
+        "utilization_percentage": utilization_pct,
+        "count_method": count_method,
+        "current_symbols": current_list,
+        "is_at_limit": is_at_limit,
+        "status": status
+    }
 
 
 def check_trade_limit(user_id: str, rules: Dict, new_symbol: str = None) -> Tuple[bool, str, Dict]:
@@ -100,31 +224,23 @@ def check_trade_limit(user_id: str, rules: Dict, new_symbol: str = None) -> Tupl
         Tuple[bool, str, Dict]: (can_trade, reason, info)
     """
     try:
-        # Obtener max_trades_open usando helper
-        max_trades = parse_rule_value(rules, "max_trades_open", 999, int)
+        max_trades, count_method = _parse_limit_rules(rules)
         if max_trades >= 999:
             return True, "no_limit_configured", {}
 
-        # Obtener count_method usando helper
-        count_method = parse_rule_value(rules, "count_method", "positions", str)
-
         # Obtener conteo actual
-        if count_method == "orders":
-            current_count, current_list = get_open_orders_count(user_id)
-            count_type = "orders"
-        else:
-            current_count, current_list = get_open_positions_count(user_id)
-            count_type = "positions"
+        current_count, current_list, current_set = _fetch_open_count(user_id, count_method)
+        count_type = "orders" if count_method == "orders" else "positions"
 
         # Verificar si ya existe posición en este símbolo
-        symbol_exists = False
-        if new_symbol and new_symbol.upper() in [s.upper() for s in current_list]:
-            symbol_exists = True
+        # (símbolos ya en mayúsculas; el frozenset viene precalculado desde los getters)
+        symbol_exists = bool(new_symbol) and new_symbol.upper() in current_set
 
         info = {
             "current_count": current_count,
             "max_allowed": max_trades,
             "count_type": count_type,
+            "count_method": count_method,
             "current_symbols": current_list,
             "symbol_exists": symbol_exists
         }
@@ -139,49 +255,43 @@ def check_trade_limit(user_id: str, rules: Dict, new_symbol: str = None) -> Tupl
         return True, "within_limits", info
 
     except Exception as e:
-        logger.error(f"Error checking trade limit for {user_id}: {e}")
-        return True, f"limit_check_error_{str(e)}", {}  # Allow trade on error
+        logger.exception("Error checking trade limit for %s", user_id)
+        return True, "limit_check_error", {"error": str(e)}  # Allow trade on error
 
 
-def get_trade_limit_summary(user_id: str, rules: Dict) -> Dict:
+def get_trade_limit_summary(user_id: str, rules: Dict,
+                            precomputed: Optional[Tuple[int, List[str], str]] = None,
+                            fetch_when_unlimited: bool = False) -> Dict:
     """
     Obtiene un resumen del estado de límites para un usuario
 
     Args:
         rules: Resultado de get_rules() con estructura {rule_name: rule_value}
+        precomputed: (current_count, current_list, count_method) ya obtenidos por el caller;
+            si se pasa, no se vuelve a consultar Binance
+        fetch_when_unlimited: Si es False y no hay límite configurado (max_trades >= 999),
+            no se consulta Binance y el conteo se reporta en 0. Los reportes que necesitan
+            el conteo real (admin, /stats) deben pasar True.
 
     Returns:
         Dict con información detallada de límites
     """
     try:
-        # Parsear valores usando helper
-        max_trades = parse_rule_value(rules, "max_trades_open", 999, int)
-        count_method = parse_rule_value(rules, "count_method", "positions", str)
+        max_trades, count_method = _parse_limit_rules(rules)
 
-        if count_method == "orders":
-            current_count, current_list = get_open_orders_count(user_id)
+        if precomputed is not None:
+            current_count, current_list, count_method = precomputed
         else:
-            current_count, current_list = get_open_positions_count(user_id)
+            if max_trades >= 999 and not fetch_when_unlimited:
+                # Sin límite configurado: evitar la llamada a Binance
+                return _compute_summary_from(user_id, max_trades, count_method, 0, [])
 
-        remaining_slots = max(0, max_trades - current_count) if max_trades < 999 else 999
-        utilization_pct = (current_count / max_trades * 100) if max_trades < 999 else 0
+            current_count, current_list, _ = _fetch_open_count(user_id, count_method)
 
-        return {
-            "user_id": user_id,
-            "max_trades_configured": max_trades,
-            "current_count": current_count,
-            "remaining_slots": remaining_slots,
-            "utilization_percentage": round(utilization_pct, 1),
-            "count_method": count_method,
-            "current_symbols": current_list,
-            "is_at_limit": current_count >= max_trades if max_trades < 999 else False,
-            "status": "AT_LIMIT" if current_count >= max_trades and max_trades < 999
-                     else "NEAR_LIMIT" if utilization_pct > 80
-                     else "NORMAL"
-        }
+        return _compute_summary_from(user_id, max_trades, count_method, current_count, current_list)
 
     except Exception as e:
-        logger.error(f"Error getting trade limit summary for {user_id}: {e}")
+        logger.exception("Error getting trade limit summary for %s", user_id)
         return {
             "user_id": user_id,
             "error": str(e),
@@ -189,12 +299,33 @@ def get_trade_limit_summary(user_id: str, rules: Dict) -> Dict:
         }
 
 
-def log_trade_limit_status(user_id: str, rules: Dict, symbol: str = None):
+def limit_info_to_summary(user_id: str, rules: Dict, info: Dict) -> Optional[Dict]:
+    """
+    Convierte el info de check_trade_limit en el resumen de get_trade_limit_summary
+    sin volver a consultar Binance. Retorna None si info no trae conteo (sin límite o error).
+
+    Uso:
+        ok, reason, info = check_trade_limit(user_id, rules, symbol)
+        log_trade_limit_status(user_id, rules, symbol, summary=limit_info_to_summary(user_id, rules, info))
+    """
+    if not info or "current_count" not in info:
+        return None
+    return get_trade_limit_summary(
+        user_id, rules,
+        precomputed=(info["current_count"], info["current_symbols"], info.get("count_method", info.get("count_type", "positions")))
+    )
+
+
+def log_trade_limit_status(user_id: str, rules: Dict, symbol: str = None, summary: Optional[Dict] = None):
     """
     Log del estado de límites para debugging
+
+    Args:
+        summary: Resumen ya calculado (ver limit_info_to_summary); si es None se calcula aquí
     """
     try:
-        summary = get_trade_limit_summary(user_id, rules)
+        if summary is None:
+            summary = get_trade_limit_summary(user_id, rules)
 
         if summary.get("error"):
             logger.warning(f"⚠️ {user_id} - Trade limit check error: {summary['error']}")
@@ -205,40 +336,47 @@ def log_trade_limit_status(user_id: str, rules: Dict, symbol: str = None):
         max_configured = summary["max_trades_configured"]
 
         if max_configured >= 999:
-            logger.debug(f"📊 {user_id} - No trade limit configured")
+            logger.debug("📊 %s - No trade limit configured", user_id)
         elif status == "AT_LIMIT":
-            logger.warning(f"🚫 {user_id} - AT LIMIT: {current}/{max_configured} trades open")
+            logger.warning("🚫 %s - AT LIMIT: %s/%s trades open", user_id, current, max_configured)
         elif status == "NEAR_LIMIT":
-            logger.info(f"⚠️ {user_id} - NEAR LIMIT: {current}/{max_configured} trades open ({summary['utilization_percentage']}%)")
+            logger.info("⚠️ %s - NEAR LIMIT: %s/%s trades open (%s%%)", user_id, current, max_configured, summary["utilization_percentage"])
         else:
-            logger.info(f"✅ {user_id} - Within limits: {current}/{max_configured} trades open")
+            logger.info("✅ %s - Within limits: %s/%s trades open", user_id, current, max_configured)
 
         if symbol:
-            if symbol.upper() in [s.upper() for s in summary["current_symbols"]]:
-                logger.warning(f"🔄 {user_id} - Position already exists for {symbol}")
+            if symbol.upper() in summary["current_symbols"]:
+                logger.warning("🔄 %s - Position already exists for %s", user_id, symbol)
 
-        if summary["current_symbols"]:
-            logger.debug(f"📋 {user_id} - Current positions: {', '.join(summary['current_symbols'])}")
+        if summary["current_symbols"] and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📋 %s - Current positions: %s", user_id, ", ".join(summary["current_symbols"]))
 
-    except Exception as e:
-        logger.error(f"Error logging trade limit status for {user_id}: {e}")
+    except Exception:
+        logger.exception("Error logging trade limit status for %s", user_id)
 
 
-def suggest_position_to_close(user_id: str, rules: Dict) -> Dict:
+def suggest_position_to_close(info_or_summary: Dict) -> Dict:
     """
     Sugiere qué posición cerrar cuando se alcanza el límite
     (función avanzada para futuras mejoras)
+
+    Función pura: recibe el info de check_trade_limit o el resumen de
+    get_trade_limit_summary, sin llamadas a Binance.
     """
     try:
-        summary = get_trade_limit_summary(user_id, rules)
+        if "is_at_limit" in info_or_summary:
+            is_at_limit = info_or_summary["is_at_limit"]
+        else:
+            max_allowed = info_or_summary.get("max_allowed", 999)
+            is_at_limit = max_allowed < 999 and info_or_summary.get("current_count", 0) >= max_allowed
 
-        if not summary.get("is_at_limit"):
+        if not is_at_limit:
             return {"suggestion": "no_action_needed"}
 
         # Lógica básica: sugerir la posición más antigua o menos rentable
         # (esto se puede expandir con más inteligencia)
 
-        current_symbols = summary.get("current_symbols", [])
+        current_symbols = info_or_summary.get("current_symbols", [])
         if not current_symbols:
             return {"suggestion": "no_positions_found"}
 
@@ -251,5 +389,5 @@ def suggest_position_to_close(user_id: str, rules: Dict) -> Dict:
         }
 
     except Exception as e:
-        logger.error(f"Error suggesting position to close for {user_id}: {e}")
-        return {"suggestion": "error", "error": str(e)}
\ No newline at end of file
+        logger.exception("Error suggesting position to close")
+        return {"suggestion": "error", "error": str(e)}
@@ -5,12 +5,116 @@ Este módulo NO genera cache, solo lo consume para evitar llamadas API duplicada
 """
 
 import json
+import os
+import re
 import time
 import logging
-from typing import Optional, Dict
+import threading
+from bisect import bisect_left
+from concurrent.futures import Future
+from itertools import accumulate
+from functools import lru_cache
+from typing import Callable, Optional, Dict, List, Tuple
+
+# orjson (C, ~3-10x más rápido) si está instalado; stdlib json como fallback.
+# orjson.JSONDecodeError hereda de json.JSONDecodeError, así que los except existentes siguen valiendo.
+# orjson.dumps retorna bytes: redis-py los acepta directamente en SET/SETEX.
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
 
 logger = logging.getLogger(__name__)
 
+# Espera máxima de un caller que se cuelga de un fetch de orderbook ya en curso (single-flight)
+_INFLIGHT_WAIT_SEC = 10
+
+
+# Layout conocido de los payloads (analyzer, WebSocket y los que escribe este cliente):
+# "timestamp" es la última key del objeto de nivel superior -> {..., "timestamp": 1700000000.123}
+# Se ancla al final del payload: un "timestamp" anidado iría seguido de "}}" y no matchea.
+_TRAILING_TIMESTAMP_RE = re.compile(r'[{,]\s*"timestamp"\s*:\s*(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)\s*\}\s*$')
+# La cola basta para contener key + número (evita escanear payloads de 100 niveles)
+_TIMESTAMP_TAIL_LEN = 64
+
+
+def _peek_timestamp(raw: str) -> Optional[float]:
+    """
+    Lee el campo "timestamp" de un payload JSON sin decodificarlo entero.
+    Permite descartar entries stale sin pagar el json.loads completo (orderbooks con 100 niveles).
+
+    Solo reconoce el layout conocido (timestamp como última key de nivel superior). Con
+    cualquier otro layout retorna None y el caller hace el decode completo como siempre.
+    """
+    match = _TRAILING_TIMESTAMP_RE.search(raw[-_TIMESTAMP_TAIL_LEN:])
+    if match is None:
+        return None
+    return float(match.group(1))
+
+
+# Variantes de casing por símbolo: un scan repite los mismos símbolos, así que se calculan una vez
+@lru_cache(maxsize=2048)
+def _cased(symbol: str) -> Tuple[str, str]:
+    """(lower, upper) de un símbolo: lower para las keys de Redis, upper para la API de Binance."""
+    return symbol.lower(), symbol.upper()
+
+
+# Resultados recientes de fallbacks a API (por proceso): misses repetidos del mismo símbolo dentro
+# de esta ventana reutilizan la última respuesta en lugar de volver a llamar a Binance
+_RECENT_API_TTL = 2.0
+_RECENT_API_MAXSIZE = 4096
+
+# Trazas de diagnóstico (keys, payloads, entries de streams) fuera del hot path.
+# Se evalúa una vez al importar: con el flag apagado ni siquiera se construyen los f-strings.
+_DEBUG = os.environ.get("BINANCE_CACHE_DEBUG") == "1"
+
+# Depth limits por símbolo (misma categorización que crypto-analyzer-redis).
+# IMPORTANTE: Binance Futures API solo acepta: 5, 10, 20, 50, 100, 500, 1000
+# Ultra-líquidos: BTC, ETH, BNB tienen liquidez extrema (>$20K por nivel)
+_ULTRA_LIQUIDITY = frozenset({'btcusdt', 'ethusdt', 'bnbusdt'})
+
+# High-liquidity: Top altcoins con liquidez consistente
+_HIGH_LIQUIDITY = frozenset({
+    'btcusdt', 'ethusdt', 'bnbusdt', 'solusdt', 'adausdt', 'dogeusdt', 'xrpusdt', 'ltcusdt',
+    'dotusdt', 'linkusdt', 'trxusdt', 'maticusdt', 'avaxusdt', 'xlmusdt'
+})
+
+# Low-liquidity: Memecoins y tokens nuevos con orderbook delgado
+_LOW_LIQUIDITY = frozenset({
+    'virtualusdt', 'vicusdt', 'wifusdt', 'trumpusdt', 'notusdt',
+    'opusdt', 'ordiusdt', 'hyperusdt', 'paxgusdt'
+})
+
+# Mid-liquidity (resto): 100 niveles, balance entre precisión y performance (75 no es válido en Binance API)
+_DEFAULT_DEPTH_LIMIT = 100
+
+# High/Low: 100 niveles (seguridad / precisión). Ultra se aplica al final porque
+# BTC/ETH/BNB también están en _HIGH_LIQUIDITY y deben quedar en 50.
+_DEPTH_LIMIT_BY_SYMBOL = {s: 100 for s in _HIGH_LIQUIDITY | _LOW_LIQUIDITY}
+_DEPTH_LIMIT_BY_SYMBOL.update({s: 50 for s in _ULTRA_LIQUIDITY})  # Suficiente para $4K slippage
+
+
+# Decoders memoizados por payload crudo: el mismo valor de Redis leído varias veces
+# (scans de estrategias sobre el mismo símbolo) se parsea una sola vez.
+# Retornan tuplas inmutables, así que compartir el resultado entre llamadas es seguro.
+# Un payload nuevo en Redis es un string distinto -> entrada nueva; el LRU descarta los viejos.
+@lru_cache(maxsize=4096)
+def _decode_mark_price(raw: str) -> Tuple[float, float]:
+    """Retorna (timestamp, mark_price) de websocket:mark_price:{symbol}."""
+    data = _json_loads(raw)
+    return float(data.get('timestamp', 0)), float(data['mark_price'])
+
+
+@lru_cache(maxsize=4096)
+def _decode_book_ticker(raw: str) -> Tuple[float, float, float]:
+    """Retorna (timestamp, best_bid, best_ask) de binance_cache:bookTicker:{symbol}."""
+    data = _json_loads(raw)
+    return float(data.get('timestamp', 0)), float(data['best_bid']), float(data['best_ask'])
+
+
 class BinanceCacheClient:
     """
     Cliente read-only para cache de Binance generado por crypto-analyzer-redis.
@@ -26,6 +130,11 @@ class BinanceCacheClient:
         # Prefix para diferentes tipos de cache
         self.websocket_prefix = "websocket"
         self.binance_cache_prefix = "binance_cache"
+        # Prefijos completos de keys, armados una vez (en hot path solo se concatena el símbolo)
+        self._mark_price_key = f"{self.websocket_prefix}:mark_price:"
+        self._ws_orderbook_key = f"{self.websocket_prefix}:orderbook:"
+        self._orderbook_key = f"{self.binance_cache_prefix}:orderbook:"
+        self._book_ticker_key = f"{self.binance_cache_prefix}:bookTicker:"
 
         # TTLs esperados (debe coincidir con crypto-data-redis)
         self.ttl_config = {
@@ -34,12 +143,17 @@ class BinanceCacheClient:
             "ticker_24h": 60,
         }
 
-        # Stats
-        self.stats = {
-            'cache_hits': 0,
-            'cache_misses': 0,
-            'fallback_api_calls': 0
-        }
+        # Single-flight de fallbacks a API: {cache_key: Future}
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+        # Última respuesta de API por (tipo, key): {(kind, key): (monotonic_ts, value)}
+        self._recent_api: Dict[Tuple[str, str], Tuple[float, object]] = {}
+
+        # Stats (atributos simples: más baratos que subscript de dict en el hot path)
+        self._hits = 0
+        self._misses = 0
+        self._fallbacks = 0
 
     def get_mark_price(self, symbol: str, client=None, max_age: int = 30) -> Optional[float]:
         """
@@ -54,59 +168,94 @@ class BinanceCacheClient:
         Returns:
             Mark price o None
         """
+        sym_l, sym_u = _cased(symbol)
+
+        # Respuesta de API de hace <2s (símbolos que el productor no cachea)
+        recent = self._recent_get(("mark_price", sym_u), max_age)
+        if recent is not None:
+            self._hits += 1
+            return recent[1]
+
+        now = time.time()
         try:
             # crypto-data-redis usa prefix "websocket" para mark_price
-            cache_key = f"{self.websocket_prefix}:mark_price:{symbol.lower()}"
+            cache_key = self._mark_price_key + sym_l
 
-            logger.warning(f"🔍 DEBUG: Buscando mark price en Redis key: '{cache_key}'")
+            if _DEBUG:
+                logger.warning(f"🔍 DEBUG: Buscando mark price en Redis key: '{cache_key}'")
 
             # Intentar obtener desde cache
             cached_data = self.redis_client.get(cache_key)
 
             if cached_data:
-                logger.warning(f"🔍 DEBUG: Mark price encontrado en Redis para '{symbol}': {cached_data[:100]}...")
-                data = json.loads(cached_data)
+                if _DEBUG:
+                    logger.warning(f"🔍 DEBUG: Mark price encontrado en Redis para '{symbol}': {cached_data[:100]}...")
+                timestamp, mark_price = _decode_mark_price(cached_data)
 
                 # Verificar age
-                age = time.time() - data.get('timestamp', 0)
+                age = now - timestamp
 
                 if age <= max_age:
-                    self.stats['cache_hits'] += 1
-                    logger.warning(f"✅ DEBUG: Mark price cache HIT: {symbol} (age: {age:.1f}s, price: {data['mark_price']})")
-                    return float(data['mark_price'])
+                    self._hits += 1
+                    logger.debug("✅ Mark price cache HIT: %s (age: %.1fs, price: %s)", symbol, age, mark_price)
+                    return mark_price
                 else:
-                    logger.warning(f"⚠️ DEBUG: Mark price cache STALE: {symbol} (age: {age:.1f}s > max_age: {max_age}s)")
+                    logger.debug("⚠️ Mark price cache STALE: %s (age: %.1fs > max_age: %ss)", symbol, age, max_age)
 
-            else:
+            elif _DEBUG:
                 logger.error(f"❌ DEBUG: Mark price NO encontrado en Redis key: '{cache_key}'")
 
-            # Cache miss o stale - hacer fallback a API si tenemos client
-            self.stats['cache_misses'] += 1
-
-            if client:
-                logger.warning(f"⚠️ Mark price cache MISS: {symbol} - fallback to API")
-                self.stats['fallback_api_calls'] += 1
-                mark_data = client.futures_mark_price(symbol=symbol.upper())
-                logger.warning(f"🔍 DEBUG: Mark price desde API: {mark_data['markPrice']}")
-                return float(mark_data["markPrice"])
-            else:
-                logger.error(f"❌ Mark price cache MISS: {symbol} - no client for fallback")
-                return None
-
         except Exception as e:
             logger.error(f"❌ Error getting mark price from cache for {symbol}: {e}")
 
-            # Fallback a API si disponible
-            if client:
-                try:
-                    self.stats['fallback_api_calls'] += 1
-                    mark_data = client.futures_mark_price(symbol=symbol.upper())
-                    return float(mark_data["markPrice"])
-                except Exception as api_error:
-                    logger.error(f"❌ API fallback also failed for {symbol}: {api_error}")
+        # Cache miss, stale o error de Redis - hacer fallback a API si tenemos client
+        self._misses += 1
 
+        if not client:
+            logger.error(f"❌ Mark price cache MISS: {symbol} - no client for fallback")
             return None
 
+        logger.warning(f"⚠️ Mark price cache MISS: {symbol} - fallback to API")
+        return self._api_mark_price(symbol, sym_u, client)
+
+    def _api_mark_price(self, symbol: str, symbol_upper: str, client) -> Optional[float]:
+        """
+        Fallback a API para mark price (una sola llamada, también cuando falló la lectura de Redis).
+
+        Returns:
+            Mark price o None si la API falla
+        """
+        try:
+            self._fallbacks += 1
+            mark_data = client.futures_mark_price(symbol=symbol_upper)
+            if _DEBUG:
+                logger.warning(f"🔍 DEBUG: Mark price desde API: {mark_data['markPrice']}")
+            mark_price = float(mark_data["markPrice"])
+            self._recent_put(("mark_price", symbol_upper), mark_price)
+            return mark_price
+        except Exception as api_error:
+            logger.error(f"❌ API fallback failed for {symbol}: {api_error}")
+            return None
+
+    def _recent_get(self, key: Tuple[str, str], max_age: float) -> Optional[Tuple[float, object]]:
+        """(age, value) de una respuesta de API reciente si sigue dentro de la ventana y de max_age."""
+        entry = self._recent_api.get(key)
+        if entry is None:
+            return None
+        age = time.monotonic() - entry[0]
+        if age > _RECENT_API_TTL or age > max_age:
+            return None
+        return age, entry[1]
+
+    def _recent_put(self, key: Tuple[str, str], value) -> None:
+        """Guarda una respuesta de API; poda las entradas vencidas si se supera el tamaño máximo."""
+        now_mono = time.monotonic()
+        if len(self._recent_api) >= _RECENT_API_MAXSIZE:
+            self._recent_api = {
+                k: v for k, v in list(self._recent_api.items()) if now_mono - v[0] <= _RECENT_API_TTL
+            }
+        self._recent_api[key] = (now_mono, value)
+
     def get_orderbook_data(self, symbol: str, depth_limit: int = None, client=None, max_age: int = 4) -> Optional[Dict]:
         """
         Obtiene orderbook data con estrategia de cache inteligente.
@@ -125,59 +274,84 @@ class BinanceCacheClient:
         Returns:
             Dict con orderbook data o None
         """
+        sym_l = _cased(symbol)[0]
+        now = time.time()
+
+        # Auto-detect depth limit usando la misma lógica que crypto-analyzer-redis
+        if depth_limit is None:
+            depth_limit = self._get_depth_limit_granular(symbol)
+
+        # 🎯 PRIORIDAD 1: Cache de crypto-analyzer-redis (más reciente, con depth específico)
+        # Formato: binance_cache:orderbook:{symbol}:{depth_limit}
+        analyzer_cache_key = f"{self._orderbook_key}{sym_l}:{depth_limit}"
+        # Formato WebSocket (prioridad 2): websocket:orderbook:{symbol}
+        websocket_cache_key = self._ws_orderbook_key + sym_l
+
+        # Respuesta de API de hace <2s (p.ej. Redis caído u orderbook vacío que no se cacheó)
+        recent = self._recent_get(("orderbook", analyzer_cache_key), max_age)
+        if recent is not None:
+            self._hits += 1
+            orderbook = dict(recent[1])
+            orderbook["source"] = "api_fallback"
+            orderbook["cache_age"] = recent[0]
+            return orderbook
+
         try:
-            # Auto-detect depth limit usando la misma lógica que crypto-analyzer-redis
-            if depth_limit is None:
-                depth_limit = self._get_depth_limit_granular(symbol)
 
-            # 🎯 PRIORIDAD 1: Cache de crypto-analyzer-redis (más reciente, con depth específico)
-            # Formato: binance_cache:orderbook:{symbol}:{depth_limit}
-            analyzer_cache_key = f"{self.binance_cache_prefix}:orderbook:{symbol.lower()}:{depth_limit}"
+            logger.debug(f"🔍 Intentando cache de crypto-analyzer-redis: '{analyzer_cache_key}' / WebSocket: '{websocket_cache_key}'")
+
+            # Ambos tiers en un solo round trip; se decide localmente cuál usar
+            analyzer_raw, websocket_raw = self.redis_client.mget([analyzer_cache_key, websocket_cache_key]) or (None, None)
 
-            logger.debug(f"🔍 Intentando cache de crypto-analyzer-redis: '{analyzer_cache_key}'")
+            cached_data = analyzer_raw
 
-            cached_data = self.redis_client.get(analyzer_cache_key)
+            # Pre-chequeo barato de staleness: un payload viejo no se decodifica
+            if cached_data:
+                peek_ts = _peek_timestamp(cached_data)
+                if peek_ts is not None and now - peek_ts > max_age:
+                    logger.debug("⏰ Cache de analyzer STALE: %s (age: %.1fs > max_age: %ss)", symbol, now - peek_ts, max_age)
+                    cached_data = None
 
             if cached_data:
                 try:
-                    cache_entry = json.loads(cached_data)
-                    age = time.time() - cache_entry.get('timestamp', 0)
+                    cache_entry = _json_loads(cached_data)
+                    age = now - cache_entry.get('timestamp', 0)
 
                     if age <= max_age:
                         # Cache HIT desde crypto-analyzer-redis
-                        self.stats['cache_hits'] += 1
+                        self._hits += 1
                         orderbook_data = cache_entry.get('orderbook_data', {})
 
                         logger.info(f"✅ Orderbook cache HIT (analyzer): {symbol} (age: {age:.1f}s, depth: {depth_limit})")
 
-                        # Retornar datos (ya están en formato procesado)
-                        return {
-                            **orderbook_data,
-                            "source": "analyzer_cache",
-                            "cache_age": age
-                        }
+                        # Retornar datos (ya están en formato procesado).
+                        # El dict es recién parseado por llamada: se anota in-place sin copiarlo
+                        orderbook_data["source"] = "analyzer_cache"
+                        orderbook_data["cache_age"] = age
+                        return orderbook_data
                     else:
                         logger.debug(f"⏰ Cache de analyzer STALE: {symbol} (age: {age:.1f}s > max_age: {max_age}s)")
                 except (json.JSONDecodeError, KeyError) as e:
                     logger.debug(f"⚠️ Error parsing analyzer cache for {symbol}: {e}")
 
             # 🎯 PRIORIDAD 2: WebSocket cache de crypto-data-redis (DEPRECADO pero backward compatible)
-            # Formato: websocket:orderbook:{symbol}
-            websocket_cache_key = f"{self.websocket_prefix}:orderbook:{symbol.lower()}"
-
-            logger.debug(f"🔍 Intentando WebSocket cache (deprecated): '{websocket_cache_key}'")
+            cached_data = websocket_raw
 
-            cached_data = self.redis_client.get(websocket_cache_key)
+            if cached_data:
+                peek_ts = _peek_timestamp(cached_data)
+                if peek_ts is not None and now - peek_ts > max_age:
+                    logger.debug("⏰ WebSocket cache STALE: %s (age: %.1fs > max_age: %ss)", symbol, now - peek_ts, max_age)
+                    cached_data = None
 
             if cached_data:
                 try:
-                    data = json.loads(cached_data)
+                    data = _json_loads(cached_data)
 
                     # Verificar age
-                    age = time.time() - data.get('timestamp', 0)
+                    age = now - data.get('timestamp', 0)
 
                     if age <= max_age:
-                        self.stats['cache_hits'] += 1
+                        self._hits += 1
 
                         # ✅ Convertir formato de crypto-data-redis (WebSocket) a formato esperado
                         best_bid = data.get('best_bid', 0)
@@ -211,73 +385,213 @@ class BinanceCacheClient:
                 except (json.JSONDecodeError, KeyError) as e:
                     logger.debug(f"⚠️ Error parsing WebSocket cache for {symbol}: {e}")
 
-            # 🎯 PRIORIDAD 3: API call fallback con depth granular
-            self.stats['cache_misses'] += 1
+        except Exception as e:
+            logger.error(f"❌ Error getting orderbook from cache for {symbol}: {e}")
+
+        # 🎯 PRIORIDAD 3: API call fallback con depth granular
+        self._misses += 1
+
+        if not client:
+            logger.error(f"❌ Orderbook cache MISS: {symbol} - no client for fallback")
+            return None
+
+        return self._api_orderbook(symbol, depth_limit, client, analyzer_cache_key, now)
+
+    def _api_orderbook(self, symbol: str, depth_limit: int, client, cache_key: str, now: float) -> Optional[Dict]:
+        """
+        Fallback a API para orderbook con single-flight por cache key.
+        Si otro thread ya está pidiendo el mismo orderbook, espera su resultado en lugar de
+        duplicar la llamada y el SETEX.
+
+        Returns:
+            Dict con orderbook procesado (source=api_fallback) o None si la API falla
+        """
+        with self._inflight_lock:
+            flight = self._inflight.get(cache_key)
+            is_leader = flight is None
+            if is_leader:
+                flight = self._inflight[cache_key] = Future()
 
-            if client:
+        try:
+            if not is_leader:
+                logger.debug("⏳ Orderbook API fetch en curso para %s - esperando resultado compartido", symbol)
+                # Copia: cada caller recibe su propio dict (los consumidores pueden mutarlo)
+                orderbook = dict(flight.result(timeout=_INFLIGHT_WAIT_SEC))
+                orderbook["source"] = "api_fallback"
+                orderbook["cache_age"] = 0
+                return orderbook
+
+            try:
                 logger.warning(f"⚠️ Orderbook cache MISS: {symbol} - fallback to API (depth={depth_limit})")
-                self.stats['fallback_api_calls'] += 1
+                orderbook_processed = self._fetch_orderbook_api(symbol, depth_limit, client, cache_key, now)
+            except Exception as fetch_error:
+                # Los followers reciben el mismo error (negative cache durante el vuelo)
+                flight.set_exception(fetch_error)
+                raise
+            else:
+                flight.set_result(orderbook_processed)
+                self._recent_put(("orderbook", cache_key), dict(orderbook_processed))
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(cache_key, None)
+
+            # Retornar datos procesados con source (ya serializados a Redis, se puede mutar)
+            orderbook_processed["source"] = "api_fallback"
+            orderbook_processed["cache_age"] = 0
+            return orderbook_processed
+
+        except Exception as api_error:
+            logger.error(f"❌ API fallback failed for {symbol}: {api_error}")
+            return None
 
-                # API call con depth limit óptimo
-                order_book = client.futures_order_book(symbol=symbol.upper(), limit=depth_limit)
+    def _fetch_orderbook_api(self, symbol: str, depth_limit: int, client, cache_key: str, now: float) -> dict:
+        """
+        Pide el orderbook a la API, calcula métricas y lo guarda en Redis con el formato de crypto-analyzer-redis.
+
+        Args:
+            symbol: Símbolo (ej: BTCUSDT)
+            depth_limit: Límite de profundidad
+            client: Cliente de Binance
+            cache_key: Key binance_cache:orderbook:{symbol}:{depth}
+            now: Timestamp (wall clock) a guardar con el payload
+
+        Returns:
+            dict: Orderbook procesado (sin source/cache_age)
+        """
+        self._fallbacks += 1
+
+        # API call con depth limit óptimo
+        order_book = client.futures_order_book(symbol=_cased(symbol)[1], limit=depth_limit)
+
+        logger.info(f"📞 Orderbook desde API: {symbol} - bids={len(order_book.get('bids', []))}, asks={len(order_book.get('asks', []))}")
 
-                logger.info(f"📞 Orderbook desde API: {symbol} - bids={len(order_book.get('bids', []))}, asks={len(order_book.get('asks', []))}")
+        # Procesar orderbook (calcular métricas)
+        orderbook_processed = self._process_orderbook_api(order_book, symbol)
 
-                # Procesar orderbook (calcular métricas)
-                orderbook_processed = self._process_orderbook_api(order_book, symbol)
+        # Orderbook vacío / degenerado: no se serializa ni se guarda (envenenaría el cache)
+        if not (orderbook_processed.get("bids") and orderbook_processed.get("asks")):
+            return orderbook_processed
 
-                # ✅ CRÍTICO: Guardar en Redis para reutilización (30s TTL)
+        # ✅ CRÍTICO: Guardar en Redis para reutilización (30s TTL)
+        try:
+            cache_data = {
+                'orderbook_data': orderbook_processed,
+                'timestamp': now
+            }
+            # Guardar con mismo formato que crypto-analyzer-redis
+            self.redis_client.setex(
+                cache_key,
+                self.ttl_config['orderbook'],  # 30 segundos
+                _json_dumps(cache_data)
+            )
+            logger.debug(f"💾 Orderbook guardado en Redis: {cache_key} (TTL=30s)")
+        except Exception as cache_error:
+            logger.warning(f"⚠️ Failed to cache orderbook for {symbol}: {cache_error}")
+
+        return orderbook_processed
+
+    def get_book_ticker(self, symbol: str, client=None, max_age: int = 30) -> Optional[Dict]:
+        """
+        Obtiene best bid/ask (top of book) con cache.
+
+        Estrategia:
+        1. WebSocket cache de crypto-data-redis (websocket:orderbook:{symbol}) con métricas pre-calculadas
+        2. Cache propio de bookTicker (binance_cache:bookTicker:{symbol})
+        3. API /fapi/v1/ticker/bookTicker (weight 2, payload mínimo) y guardado en Redis
+
+        Args:
+            symbol: Símbolo (ej: BTCUSDT)
+            client: Cliente de Binance (para fallback)
+            max_age: Edad máxima aceptable del cache en segundos
+
+        Returns:
+            Dict con best_bid, best_ask, source, cache_age (+ métricas si vienen del WebSocket) o None
+        """
+        sym_l, sym_u = _cased(symbol)
+        now = time.time()
+        websocket_cache_key = self._ws_orderbook_key + sym_l
+        book_ticker_key = self._book_ticker_key + sym_l
+
+        try:
+            # 🎯 PRIORIDAD 1: WebSocket cache (incluye spread/slippage/depth pre-calculados)
+            cached_data = self.redis_client.get(websocket_cache_key)
+
+            if cached_data:
                 try:
-                    cache_data = {
-                        'orderbook_data': orderbook_processed,
-                        'timestamp': time.time()
-                    }
-                    # Guardar con mismo formato que crypto-analyzer-redis
-                    self.redis_client.setex(
-                        analyzer_cache_key,
-                        self.ttl_config['orderbook'],  # 30 segundos
-                        json.dumps(cache_data)
-                    )
-                    logger.debug(f"💾 Orderbook guardado en Redis: {analyzer_cache_key} (TTL=30s)")
-                except Exception as cache_error:
-                    logger.warning(f"⚠️ Failed to cache orderbook for {symbol}: {cache_error}")
+                    data = _json_loads(cached_data)
+                    age = now - data.get('timestamp', 0)
+
+                    if age <= max_age and data.get('best_bid', 0) > 0 and data.get('best_ask', 0) > 0:
+                        self._hits += 1
+                        data["source"] = "websocket_cache"
+                        data["cache_age"] = age
+                        return data
+                except (json.JSONDecodeError, KeyError) as e:
+                    logger.debug(f"⚠️ Error parsing WebSocket cache for {symbol}: {e}")
 
-                # Retornar datos procesados con source
-                return {
-                    **orderbook_processed,
-                    "source": "api_fallback",
-                    "cache_age": 0
-                }
-            else:
-                logger.error(f"❌ Orderbook cache MISS: {symbol} - no client for fallback")
-                return None
+            # 🎯 PRIORIDAD 2: Cache de bookTicker
+            cached_data = self.redis_client.get(book_ticker_key)
+
+            if cached_data:
+                try:
+                    timestamp, best_bid, best_ask = _decode_book_ticker(cached_data)
+                    age = now - timestamp
+
+                    if age <= max_age:
+                        self._hits += 1
+                        return {
+                            "best_bid": best_bid,
+                            "best_ask": best_ask,
+                            "source": "book_ticker_cache",
+                            "cache_age": age
+                        }
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                    logger.debug(f"⚠️ Error parsing bookTicker cache for {symbol}: {e}")
 
         except Exception as e:
-            logger.error(f"❌ Error getting orderbook from cache for {symbol}: {e}")
+            logger.error(f"❌ Error getting bookTicker from cache for {symbol}: {e}")
 
-            # Fallback a API si disponible
-            if client:
-                try:
-                    # Auto-detect depth si no se especificó
-                    if depth_limit is None:
-                        depth_limit = self._get_depth_limit_granular(symbol)
+        # 🎯 PRIORIDAD 3: API bookTicker
+        self._misses += 1
 
-                    self.stats['fallback_api_calls'] += 1
-                    order_book = client.futures_order_book(symbol=symbol.upper(), limit=depth_limit)
+        if not client:
+            logger.error(f"❌ bookTicker cache MISS: {symbol} - no client for fallback")
+            return None
 
-                    # Procesar orderbook
-                    orderbook_processed = self._process_orderbook_api(order_book, symbol)
+        return self._api_book_ticker(symbol, sym_u, client, book_ticker_key, now)
 
-                    return {
-                        **orderbook_processed,
-                        "source": "api_fallback_error",
-                        "cache_age": 0
-                    }
-                except Exception as api_error:
-                    logger.error(f"❌ API fallback also failed for {symbol}: {api_error}")
+    def _api_book_ticker(self, symbol: str, symbol_upper: str, client, cache_key: str, now: float) -> Optional[Dict]:
+        """
+        Fallback a API /fapi/v1/ticker/bookTicker y guardado en binance_cache:bookTicker:{symbol}.
 
+        Returns:
+            Dict con best_bid, best_ask (source=api_fallback) o None si la API falla
+        """
+        try:
+            self._fallbacks += 1
+            book_ticker = client.futures_orderbook_ticker(symbol=symbol_upper)
+            best_bid = float(book_ticker["bidPrice"])
+            best_ask = float(book_ticker["askPrice"])
+        except Exception as api_error:
+            logger.error(f"❌ API fallback failed for {symbol}: {api_error}")
             return None
 
+        try:
+            self.redis_client.setex(
+                cache_key,
+                self.ttl_config['orderbook'],
+                _json_dumps({"best_bid": best_bid, "best_ask": best_ask, "timestamp": now})
+            )
+        except Exception as cache_error:
+            logger.warning(f"⚠️ Failed to cache bookTicker for {symbol}: {cache_error}")
+
+        return {
+            "best_bid": best_bid,
+            "best_ask": best_ask,
+            "source": "api_fallback",
+            "cache_age": 0
+        }
+
     def _get_depth_limit_granular(self, symbol: str) -> int:
         """
         Determina el depth limit óptimo usando la misma lógica granular que crypto-analyzer-redis.
@@ -296,30 +610,7 @@ class BinanceCacheClient:
         Returns:
             int: Depth limit óptimo
         """
-        symbol_lower = symbol.lower()
-
-        # Ultra-líquidos: BTC, ETH, BNB tienen liquidez extrema (>$20K por nivel)
-        if symbol_lower in {'btcusdt', 'ethusdt', 'bnbusdt'}:
-            return 50  # Suficiente para $4K slippage
-
-        # High-liquidity: Top altcoins con liquidez consistente
-        HIGH_LIQUIDITY = {
-            'btcusdt', 'ethusdt', 'bnbusdt', 'solusdt', 'adausdt', 'dogeusdt', 'xrpusdt', 'ltcusdt',
-            'dotusdt', 'linkusdt', 'trxusdt', 'maticusdt', 'avaxusdt', 'xlmusdt'
-        }
-        if symbol_lower in HIGH_LIQUIDITY:
-            return 100  # Margen de seguridad (75 no es válido en Binance API)
-
-        # Low-liquidity: Memecoins y tokens nuevos con orderbook delgado
-        LOW_LIQUIDITY = {
-            'virtualusdt', 'vicusdt', 'wifusdt', 'trumpusdt', 'notusdt',
-            'opusdt', 'ordiusdt', 'hyperusdt', 'paxgusdt'
-        }
-        if symbol_lower in LOW_LIQUIDITY:
-            return 100  # Crítico para precisión
-
-        # Mid-liquidity: Resto de altcoins establecidos
-        return 100  # Balance entre precisión y performance (75 no es válido en Binance API)
+        return _DEPTH_LIMIT_BY_SYMBOL.get(_cased(symbol)[0], _DEFAULT_DEPTH_LIMIT)
 
     def _process_orderbook_api(self, order_book: dict, symbol: str) -> dict:
         """
@@ -348,20 +639,23 @@ class BinanceCacheClient:
                     "imbalance_pct": 0
                 }
 
+            # Convertir strings -> float una sola vez por nivel
+            bid_levels = [(float(p), float(q)) for p, q in bids]
+            ask_levels = [(float(p), float(q)) for p, q in asks]
+
             # Best bid/ask
-            best_bid = float(bids[0][0])
-            best_ask = float(asks[0][0])
+            best_bid = bid_levels[0][0]
+            best_ask = ask_levels[0][0]
 
             # Spread
             spread_abs = best_ask - best_bid
             spread_pct = (spread_abs / best_ask) * 100
 
             # Depth (liquidez total en USDT, convertido a millones)
-            def total_notional(orders):
-                return sum(float(p) * float(q) for p, q in orders)
-
-            bid_notional = total_notional(bids)
-            ask_notional = total_notional(asks)
+            # Notional acumulado de asks: se reutiliza para el total y para el slippage
+            ask_cum_notional = list(accumulate(p * q for p, q in ask_levels))
+            bid_notional = sum(p * q for p, q in bid_levels)
+            ask_notional = ask_cum_notional[-1]
 
             # Imbalance (positivo = más bids, negativo = más asks)
             total_notional_sum = bid_notional + ask_notional
@@ -370,33 +664,20 @@ class BinanceCacheClient:
                 if total_notional_sum > 0 else 0
             )
 
-            # Slippage (estimación de ejecución de market order para $3K)
+            # Slippage (estimación de ejecución de market order para $3K en asks)
             slippage_qty = 3000  # DEFAULT_SLIPPAGE_QTY
 
-            def estimate_slippage(orderbook_side, qty_usdt):
-                """Estima precio promedio de ejecución"""
-                filled = 0
-                total_qty = 0
-
-                for price_str, qty_str in orderbook_side:
-                    price = float(price_str)
-                    qty = float(qty_str)
-                    notional = price * qty
-
-                    if filled + notional >= qty_usdt:
-                        remaining = qty_usdt - filled
-                        qty_needed = remaining / price
-                        total_qty += qty_needed
-                        break
-
-                    filled += notional
-                    total_qty += qty
-
-                avg_price = qty_usdt / total_qty if total_qty > 0 else best_ask
-                return avg_price
+            # Primer nivel donde el notional acumulado cubre slippage_qty (búsqueda binaria)
+            fill_idx = bisect_left(ask_cum_notional, slippage_qty)
+            if fill_idx < len(ask_levels):
+                filled = ask_cum_notional[fill_idx - 1] if fill_idx > 0 else 0
+                fill_price = ask_levels[fill_idx][0]
+                total_qty = sum(q for _, q in ask_levels[:fill_idx]) + (slippage_qty - filled) / fill_price
+            else:
+                # El libro no alcanza para slippage_qty: se consume entero
+                total_qty = sum(q for _, q in ask_levels)
 
-            # Calcular slippage para BUY (market order en asks)
-            avg_execution_price = estimate_slippage(asks, slippage_qty)
+            avg_execution_price = slippage_qty / total_qty if total_qty > 0 else best_ask
             slippage_pct = ((avg_execution_price - best_ask) / best_ask) * 100
 
             return {
@@ -422,7 +703,7 @@ class BinanceCacheClient:
                 "imbalance_pct": 0
             }
 
-    def get_klines_from_redis(self, symbol: str, interval: str = "1m", limit: int = 60) -> Optional[list]:
+    def get_klines_from_redis(self, symbol: str, interval: str = "1m", limit: int = 60) -> Optional[List[tuple]]:
         """
         Obtiene klines desde Redis poblado por crypto-data-redis.
 
@@ -432,110 +713,90 @@ class BinanceCacheClient:
             limit: Número de klines a obtener
 
         Returns:
-            Lista de klines o None
+            Lista de klines (tuplas de 12 campos, mismo orden que futures_klines) o None
         """
+        sym_l = _cased(symbol)[0]
         try:
             # crypto-data-redis guarda candles con formato: candles:symbol:interval
             # Usar Redis Streams (XRANGE) en lugar de keys regulares
-            stream_key = f"candles:{symbol.lower()}:{interval}"
+            stream_key = f"candles:{sym_l}:{interval}"
 
-            logger.warning(f"🔍 DEBUG: Intentando leer Redis stream key: '{stream_key}'")
+            if _DEBUG:
+                logger.warning(f"🔍 DEBUG: Intentando leer Redis stream key: '{stream_key}'")
 
             # Leer últimos 'limit' elementos del stream
             entries = self.redis_client.xrevrange(stream_key, max="+", min="-", count=limit)
 
-            logger.warning(f"🔍 DEBUG: Redis XREVRANGE returned {len(entries) if entries else 0} entries for '{stream_key}'")
+            if _DEBUG:
+                logger.warning(f"🔍 DEBUG: Redis XREVRANGE returned {len(entries) if entries else 0} entries for '{stream_key}'")
 
             if entries:
-                logger.warning(f"🔍 DEBUG: Primera entry en stream '{stream_key}': id={entries[0][0]}, fields={list(entries[0][1].keys())}")
-
-                klines = []
-                # Convertir formato de stream a formato de klines
-                for entry_id, fields in reversed(entries):  # Invertir para orden cronológico
+                if _DEBUG:
+                    logger.warning(f"🔍 DEBUG: Primera entry en stream '{stream_key}': id={entries[0][0]}, fields={list(entries[0][1].keys())}")
+
+                # Preasignada (sin resizes por append); se recorta al final si hubo entries inválidas
+                klines = [None] * len(entries)
+                n = 0
+                # XREVRANGE trae newest-first (las últimas N); la lista es nuestra, se invierte in-place
+                # para recorrerla en orden cronológico
+                entries.reverse()
+                # Convertir formato de stream a formato de klines.
+                # ResilientRedisClient usa decode_responses=True: ids y fields llegan como str.
+                for entry_id, fields in entries:
                     try:
-                        # Manejar entry_id como bytes o string
-                        if isinstance(entry_id, bytes):
-                            entry_id_str = entry_id.decode()
-                        else:
-                            entry_id_str = str(entry_id)
-
-                        timestamp_ms = int(entry_id_str.split('-')[0])
-
-                        # Helper para obtener valores de fields (manejar bytes y strings)
-                        def get_field(field_name):
-                            # Intentar con bytes primero
-                            if isinstance(field_name, str):
-                                field_name_bytes = field_name.encode()
-                            else:
-                                field_name_bytes = field_name
-
-                            # Buscar key en formato bytes o string
-                            value = fields.get(field_name_bytes) or fields.get(field_name if isinstance(field_name, str) else field_name.decode())
-
-                            if value is None:
-                                return None
-
-                            # Retornar como string
-                            if isinstance(value, bytes):
-                                return value.decode()
-                            return str(value)
-
-                        # Validar campos requeridos (intentar ambos formatos)
-                        required_fields = ["o", "h", "l", "c", "v"]
-                        field_values = {}
-
-                        for field in required_fields:
-                            val = get_field(field)
-                            if val is None:
-                                logger.error(f"❌ DEBUG: Entry en '{stream_key}' falta campo '{field}', tiene: {list(fields.keys())}")
-                                break
-                            field_values[field] = val
-                        else:
-                            # Todos los campos encontrados, crear kline
-                            kline = [
-                                timestamp_ms,                           # 0: Open time
-                                field_values["o"],                      # 1: Open
-                                field_values["h"],                      # 2: High
-                                field_values["l"],                      # 3: Low
-                                field_values["c"],                      # 4: Close
-                                field_values["v"],                      # 5: Volume
-                                timestamp_ms + 60000,                   # 6: Close time (aprox)
-                                field_values["v"],                      # 7: Quote asset volume (mismo que volume)
-                                0,                                       # 8: Number of trades
-                                field_values["v"],                      # 9: Taker buy base volume
-                                field_values["v"],                      # 10: Taker buy quote volume
-                                "0"                                      # 11: Ignore
-                            ]
-                            klines.append(kline)
-
-                    except Exception as parse_error:
-                        logger.error(f"❌ DEBUG: Error parsing stream entry for {symbol}: {parse_error}")
-                        import traceback
-                        logger.error(f"❌ DEBUG: Traceback: {traceback.format_exc()}")
+                        timestamp_ms = int(entry_id.split('-', 1)[0])
+                        open_ = fields["o"]
+                        high = fields["h"]
+                        low = fields["l"]
+                        close = fields["c"]
+                        volume = fields["v"]
+                    except (KeyError, ValueError, AttributeError) as parse_error:
+                        logger.error("❌ Entry inválida en '%s' (%s): %s", stream_key, parse_error, list(fields.keys()))
                         continue
 
+                    # Tupla: los consumidores solo leen por índice (ej: k[7] en dynamic_rules)
+                    klines[n] = (
+                        timestamp_ms,                           # 0: Open time
+                        open_,                                  # 1: Open
+                        high,                                   # 2: High
+                        low,                                    # 3: Low
+                        close,                                  # 4: Close
+                        volume,                                 # 5: Volume
+                        timestamp_ms + 60000,                   # 6: Close time (aprox)
+                        volume,                                 # 7: Quote asset volume (mismo que volume)
+                        0,                                      # 8: Number of trades
+                        volume,                                 # 9: Taker buy base volume
+                        volume,                                 # 10: Taker buy quote volume
+                        "0"                                     # 11: Ignore
+                    )
+                    n += 1
+
+                del klines[n:]
+
                 if klines:
-                    self.stats['cache_hits'] += 1
-                    logger.warning(f"✅ DEBUG: Klines cache HIT: {symbol} {interval} ({len(klines)} candles from stream)")
-                    logger.warning(f"🔍 DEBUG: Primera kline parseada: timestamp={klines[0][0]}, close={klines[0][4]}, volume={klines[0][5]}")
+                    self._hits += 1
+                    logger.debug("✅ Klines cache HIT: %s %s (%d candles from stream)", symbol, interval, len(klines))
+                    if _DEBUG:
+                        logger.warning(f"🔍 DEBUG: Primera kline parseada: timestamp={klines[0][0]}, close={klines[0][4]}, volume={klines[0][5]}")
                     return klines
                 else:
-                    self.stats['cache_misses'] += 1
+                    self._misses += 1
                     logger.error(f"❌ DEBUG: Klines cache MISS: {symbol} {interval} - stream tiene {len(entries)} entries pero ninguna válida")
                     return None
             else:
-                self.stats['cache_misses'] += 1
+                self._misses += 1
                 logger.error(f"❌ DEBUG: Klines cache MISS: {symbol} {interval} - stream '{stream_key}' vacío o no existe")
 
-                # Verificar si el key existe en Redis
-                try:
-                    key_type = self.redis_client.type(stream_key)
-                    logger.error(f"❌ DEBUG: Redis key '{stream_key}' type: {key_type}")
-                    if key_type == b'stream' or key_type == 'stream':
-                        stream_info = self.redis_client.xinfo_stream(stream_key)
-                        logger.error(f"❌ DEBUG: Stream info para '{stream_key}': length={stream_info.get('length', 0)}")
-                except Exception as info_error:
-                    logger.error(f"❌ DEBUG: Error obteniendo info de '{stream_key}': {info_error}")
+                # Verificar si el key existe en Redis (solo diagnóstico)
+                if _DEBUG:
+                    try:
+                        key_type = self.redis_client.type(stream_key)
+                        logger.error(f"❌ DEBUG: Redis key '{stream_key}' type: {key_type}")
+                        if key_type == b'stream' or key_type == 'stream':
+                            stream_info = self.redis_client.xinfo_stream(stream_key)
+                            logger.error(f"❌ DEBUG: Stream info para '{stream_key}': length={stream_info.get('length', 0)}")
+                    except Exception as info_error:
+                        logger.error(f"❌ DEBUG: Error obteniendo info de '{stream_key}': {info_error}")
 
                 return None
 
@@ -549,36 +810,98 @@ class BinanceCacheClient:
         """
         Obtiene estadísticas de uso del cache
         """
-        total_requests = self.stats['cache_hits'] + self.stats['cache_misses']
-        hit_rate = (self.stats['cache_hits'] / total_requests * 100) if total_requests > 0 else 0
+        hits = self._hits
+        misses = self._misses
+        total_requests = hits + misses
+        hit_rate = (hits / total_requests * 100) if total_requests > 0 else 0
 
         return {
             'cache_hit_rate': round(hit_rate, 2),
             'total_requests': total_requests,
-            'cache_hits': self.stats['cache_hits'],
-            'cache_misses': self.stats['cache_misses'],
-            'fallback_api_calls': self.stats['fallback_api_calls'],
+            'cache_hits': hits,
+            'cache_misses': misses,
+            'fallback_api_calls': self._fallbacks,
             'efficiency': 'Excellent' if hit_rate > 80 else 'Good' if hit_rate > 60 else 'Poor'
         }
 
     def clear_stats(self):
         """Reset estadísticas"""
-        self.stats = {
-            'cache_hits': 0,
-            'cache_misses': 0,
-            'fallback_api_calls': 0
+        self._hits = 0
+        self._misses = 0
+        self._fallbacks = 0
+
+    @property
+    def stats(self) -> Dict:
+        """Snapshot de contadores (mismo formato que el antiguo dict self.stats)"""
+        return {
+            'cache_hits': self._hits,
+            'cache_misses': self._misses,
+            'fallback_api_calls': self._fallbacks
         }
 
 
 # Cache local para exchange_info (casi estático)
-_exchange_info_cache = {
-    "data": None,
-    "timestamp": 0,
-    "ttl": 3600  # 1 hora
-}
+# Caches en proceso: expiración con reloj monotónico en ns (entero, inmune a saltos del reloj de pared).
+# Los timestamps guardados en Redis siguen siendo wall clock en segundos (formato compartido con los productores).
+# Cada entrada es una tupla inmutable (data, expiry_ns) que se reemplaza entera: un lector nunca
+# ve data nueva con expiry viejo (o al revés) aunque otro thread esté actualizando, sin lock en la lectura.
+_NS_PER_SEC = 1_000_000_000
+
+_exchange_info_ttl_ns = 3600 * _NS_PER_SEC  # 1 hora
+_exchange_info_cache: Tuple[Optional[Dict], int] = (None, 0)  # (data, expiry_ns)
 
-_leverage_bracket_cache = {}  # {symbol: {data, timestamp}}
+_leverage_bracket_cache: Dict[str, Tuple[list, int]] = {}  # {symbol: (data, expiry_ns)}, orden = último refresh
 _leverage_bracket_ttl = 3600  # 1 hora
+_leverage_bracket_ttl_ns = _leverage_bracket_ttl * _NS_PER_SEC
+_LEVERAGE_BRACKET_MAXSIZE = 512  # Tope de símbolos en memoria (workers de larga vida)
+
+# Locks de refresh (solo los toma quien va a llamar a la API; las lecturas frescas no los tocan).
+# Al expirar: un solo thread refresca; el resto sirve el valor stale mientras tanto
+# (stale-while-revalidate) o, si no hay valor, espera al refresh en curso.
+_exchange_info_lock = threading.Lock()
+_bracket_locks: Dict[str, threading.Lock] = {}
+_bracket_locks_guard = threading.Lock()
+
+# Refresh en background de exchange_info (start_metadata_refresher).
+# Los leverage brackets NO se refrescan en background: es un endpoint firmado y debe usar
+# las credenciales (y el rate limit) del usuario que los pide.
+_refresher_thread: Optional[threading.Thread] = None
+_refresher_lock = threading.Lock()
+
+
+def _bracket_lock(symbol_upper: str) -> threading.Lock:
+    """Lock de refresh por símbolo (creado bajo demanda)."""
+    lock = _bracket_locks.get(symbol_upper)
+    if lock is None:
+        with _bracket_locks_guard:
+            lock = _bracket_locks.setdefault(symbol_upper, threading.Lock())
+    return lock
+
+
+def _store_leverage_bracket(symbol_upper: str, brackets: list, now_ns: int) -> None:
+    """
+    Guarda brackets de un símbolo con cota de tamaño: al superar _LEVERAGE_BRACKET_MAXSIZE se
+    descartan primero las entradas expiradas y luego las refrescadas hace más tiempo.
+    """
+    with _bracket_locks_guard:
+        # Re-insertar al final: el dict queda ordenado por último refresh
+        _leverage_bracket_cache.pop(symbol_upper, None)
+        _leverage_bracket_cache[symbol_upper] = (brackets, now_ns + _leverage_bracket_ttl_ns)
+
+        if len(_leverage_bracket_cache) <= _LEVERAGE_BRACKET_MAXSIZE:
+            return
+
+        evicted = [sym for sym, (_, expiry_ns) in _leverage_bracket_cache.items() if expiry_ns <= now_ns]
+        overflow = len(_leverage_bracket_cache) - len(evicted) - _LEVERAGE_BRACKET_MAXSIZE
+        if overflow > 0:
+            live = (sym for sym, (_, expiry_ns) in _leverage_bracket_cache.items() if expiry_ns > now_ns)
+            evicted.extend(next(live) for _ in range(overflow))
+
+        for sym in evicted:
+            del _leverage_bracket_cache[sym]
+            lock = _bracket_locks.get(sym)
+            if lock is not None and not lock.locked():
+                del _bracket_locks[sym]
 
 
 def get_exchange_info_cached(client) -> Optional[Dict]:
@@ -594,21 +917,34 @@ def get_exchange_info_cached(client) -> Optional[Dict]:
     """
     global _exchange_info_cache
 
-    try:
-        # Verificar si cache es válido
-        age = time.time() - _exchange_info_cache["timestamp"]
+    # Snapshot atómico de la entrada
+    data, expiry_ns = _exchange_info_cache
+    now_ns = time.monotonic_ns()
 
-        if _exchange_info_cache["data"] is not None and age < _exchange_info_cache["ttl"]:
-            logger.debug(f"✅ Exchange info cache HIT (age: {age:.0f}s)")
-            return _exchange_info_cache["data"]
+    # Verificar si cache es válido
+    if data is not None and now_ns < expiry_ns:
+        logger.debug("✅ Exchange info cache HIT (expira en: %.0fs)", (expiry_ns - now_ns) / _NS_PER_SEC)
+        return data
+
+    # Expirado con valor previo: si otro thread ya está refrescando, servir stale.
+    # Sin valor previo: esperar al refresh en curso (no duplicar la llamada).
+    if not _exchange_info_lock.acquire(blocking=data is None):
+        logger.debug("♻️ Exchange info refresh en curso - sirviendo cache stale")
+        return data
+
+    try:
+        # Double-check: otro thread pudo refrescar mientras esperábamos el lock
+        data, expiry_ns = _exchange_info_cache
+        now_ns = time.monotonic_ns()
+        if data is not None and now_ns < expiry_ns:
+            return data
 
         # Cache miss o expirado - obtener desde API
         logger.info("⚠️ Exchange info cache MISS - fetching from API")
         exchange_info = client.futures_exchange_info()
 
-        # Actualizar cache
-        _exchange_info_cache["data"] = exchange_info
-        _exchange_info_cache["timestamp"] = time.time()
+        # Actualizar cache (swap de una sola referencia)
+        _exchange_info_cache = (exchange_info, now_ns + _exchange_info_ttl_ns)
 
         return exchange_info
 
@@ -616,12 +952,15 @@ def get_exchange_info_cached(client) -> Optional[Dict]:
         logger.error(f"❌ Error getting exchange_info: {e}")
 
         # Intentar retornar cache stale si disponible
-        if _exchange_info_cache["data"] is not None:
+        if data is not None:
             logger.warning("Using stale exchange_info cache as fallback")
-            return _exchange_info_cache["data"]
+            return data
 
         return None
 
+    finally:
+        _exchange_info_lock.release()
+
 
 def get_leverage_bracket_cached(symbol: str, client) -> Optional[list]:
     """
@@ -635,29 +974,36 @@ def get_leverage_bracket_cached(symbol: str, client) -> Optional[list]:
     Returns:
         Lista con leverage brackets o None
     """
-    global _leverage_bracket_cache
+    symbol_upper = _cased(symbol)[1]
 
-    try:
-        symbol_upper = symbol.upper()
+    # Snapshot atómico de la entrada (None si no existe)
+    cache_entry = _leverage_bracket_cache.get(symbol_upper)
+    now_ns = time.monotonic_ns()
+
+    # Verificar si cache es válido
+    if cache_entry is not None and now_ns < cache_entry[1]:
+        logger.debug("✅ Leverage bracket cache HIT for %s (expira en: %.0fs)", symbol, (cache_entry[1] - now_ns) / _NS_PER_SEC)
+        return cache_entry[0]
 
-        # Verificar si cache es válido
-        if symbol_upper in _leverage_bracket_cache:
-            cache_entry = _leverage_bracket_cache[symbol_upper]
-            age = time.time() - cache_entry["timestamp"]
+    # Mismo esquema que exchange_info: un refresh por símbolo, stale para el resto
+    lock = _bracket_lock(symbol_upper)
+    if not lock.acquire(blocking=cache_entry is None):
+        logger.debug("♻️ Leverage bracket refresh en curso for %s - sirviendo cache stale", symbol)
+        return cache_entry[0]
 
-            if age < _leverage_bracket_ttl:
-                logger.debug(f"✅ Leverage bracket cache HIT for {symbol} (age: {age:.0f}s)")
-                return cache_entry["data"]
+    try:
+        # Double-check tras obtener el lock
+        cache_entry = _leverage_bracket_cache.get(symbol_upper)
+        now_ns = time.monotonic_ns()
+        if cache_entry is not None and now_ns < cache_entry[1]:
+            return cache_entry[0]
 
         # Cache miss o expirado - obtener desde API
         logger.info(f"⚠️ Leverage bracket cache MISS for {symbol} - fetching from API")
         brackets = client.futures_leverage_bracket(symbol=symbol_upper)
 
-        # Actualizar cache
-        _leverage_bracket_cache[symbol_upper] = {
-            "data": brackets,
-            "timestamp": time.time()
-        }
+        # Actualizar cache (acotado)
+        _store_leverage_bracket(symbol_upper, brackets, now_ns)
 
         return brackets
 
@@ -665,12 +1011,76 @@ def get_leverage_bracket_cached(symbol: str, client) -> Optional[list]:
         logger.error(f"❌ Error getting leverage bracket for {symbol}: {e}")
 
         # Intentar retornar cache stale si disponible
-        if symbol.upper() in _leverage_bracket_cache:
+        if cache_entry is not None:
             logger.warning(f"Using stale leverage bracket cache for {symbol}")
-            return _leverage_bracket_cache[symbol.upper()]["data"]
+            return cache_entry[0]
 
         return None
 
+    finally:
+        lock.release()
+
+
+def _refresh_exchange_info(client) -> None:
+    """Un ciclo de refresh de exchange_info (errores se loguean; el cache stale se conserva)."""
+    global _exchange_info_cache
+
+    with _exchange_info_lock:
+        try:
+            exchange_info = client.futures_exchange_info()
+            _exchange_info_cache = (exchange_info, time.monotonic_ns() + _exchange_info_ttl_ns)
+            logger.info("🔄 Exchange info refrescado en background")
+        except Exception as e:
+            logger.error(f"❌ Background refresh de exchange_info falló: {e}")
+
+
+# Reintento cuando no se pudo construir el cliente (Binance inaccesible al arrancar)
+_REFRESHER_CLIENT_RETRY_SEC = 60
+
+
+def _metadata_refresh_loop(client_factory: Callable, interval_sec: float) -> None:
+    client = None
+    while True:
+        if client is None:
+            # El cliente se construye aquí y no en el arranque: Client() hace ping a Binance
+            try:
+                client = client_factory()
+            except Exception as e:
+                logger.error(f"❌ Metadata refresher: no se pudo crear el cliente de Binance: {e}")
+                time.sleep(_REFRESHER_CLIENT_RETRY_SEC)
+                continue
+
+        _refresh_exchange_info(client)
+        time.sleep(interval_sec)
+
+
+def start_metadata_refresher(client_factory: Callable) -> None:
+    """
+    Precarga exchange_info y lo mantiene refrescado en un thread daemon, antes de que expire
+    el TTL: los requests nunca esperan a la API.
+    Idempotente: solo arranca un thread por proceso. No bloquea ni falla si Binance no responde.
+
+    Args:
+        client_factory: Callable que devuelve el cliente de Binance para exchange_info
+                        (endpoint público: get_public_binance_client). Se invoca dentro del thread.
+    """
+    global _refresher_thread
+
+    with _refresher_lock:
+        if _refresher_thread is not None and _refresher_thread.is_alive():
+            return
+
+        # Refrescar al 90% del TTL
+        interval_sec = 0.9 * _exchange_info_ttl_ns / _NS_PER_SEC
+        _refresher_thread = threading.Thread(
+            target=_metadata_refresh_loop,
+            args=(client_factory, interval_sec),
+            name="binance_metadata_refresher",
+            daemon=True
+        )
+        _refresher_thread.start()
+        logger.info(f"🔄 Metadata refresher iniciado (cada {interval_sec:.0f}s)")
+
 
 # Instancia global (se inicializa en main.py o donde se tenga redis_client)
 _binance_cache_client = None
@@ -1,7 +1,10 @@
 # app/utils/binance/binance_client.py
 
 import os
+import threading
+from functools import lru_cache
 from binance.client import Client
+from requests.adapters import HTTPAdapter
 from app.utils.config.settings import (
     get_binance_api_key_for_user,
     get_binance_api_secret_for_user
@@ -10,27 +13,23 @@ from app.utils.config.settings import (
 from app.utils.logger_config import get_logger
 logger = get_logger()
 
-def get_binance_client_for_user(user_id: str):
-    """
-    Crea un cliente de Binance para el usuario especificado.
-    Soporta modo Testnet para pruebas sin riesgo.
+# Modo Testnet: se lee una sola vez al importar (el entorno no cambia en runtime)
+_USE_TESTNET = os.environ.get("USE_BINANCE_TESTNET", "false").strip().lower() == "true"
 
-    Para activar Testnet, define en .env:
-        USE_BINANCE_TESTNET=true
+# Pool HTTP por cliente de usuario (varios threads del mismo usuario comparten el cliente)
+USER_CLIENT_POOL_SIZE = 16
 
-    Args:
-        user_id: ID del usuario
 
-    Returns:
-        Client: Cliente de Binance (producción o testnet)
+@lru_cache(maxsize=64)
+def _build_user_client(user_id: str) -> Client:
+    """
+    Construye (una vez por usuario) el cliente de Binance.
+    Construir un Client hace ping + handshake TLS; reutilizarlo mantiene las conexiones calientes.
     """
     api_key = get_binance_api_key_for_user(user_id)
     api_secret = get_binance_api_secret_for_user(user_id)
 
-    # Verificar si se debe usar Testnet
-    use_testnet = os.environ.get("USE_BINANCE_TESTNET", "false").lower() == "true"
-
-    if use_testnet:
+    if _USE_TESTNET:
         # Configurar cliente para Testnet de Binance Futures
         client = Client(api_key, api_secret, testnet=True)
 
@@ -45,4 +44,73 @@ def get_binance_client_for_user(user_id: str):
         # Cliente de producción normal
         client = Client(api_key, api_secret)
 
-    return client
\ No newline at end of file
+    adapter = HTTPAdapter(pool_connections=USER_CLIENT_POOL_SIZE, pool_maxsize=USER_CLIENT_POOL_SIZE)
+    client.session.mount("https://", adapter)
+
+    return client
+
+
+def get_binance_client_for_user(user_id: str):
+    """
+    Retorna el cliente de Binance (cacheado) para el usuario especificado.
+    Soporta modo Testnet para pruebas sin riesgo.
+
+    Para activar Testnet, define en .env:
+        USE_BINANCE_TESTNET=true
+
+    Llamar invalidate_user_clients() si rotan las API keys.
+
+    Args:
+        user_id: ID del usuario
+
+    Returns:
+        Client: Cliente de Binance (producción o testnet)
+    """
+    return _build_user_client(user_id)
+
+
+def invalidate_user_clients():
+    """Descarta los clientes cacheados por usuario (p.ej. tras rotación de API keys)"""
+    _build_user_client.cache_clear()
+
+# Cliente compartido para endpoints públicos (mark price, bookTicker, order book).
+# No requiere API key, así que todos los usuarios pueden reutilizar el mismo pool HTTP.
+PUBLIC_CLIENT_POOL_SIZE = 32
+
+_public_client = None
+_public_client_lock = threading.Lock()
+
+
+def get_public_binance_client():
+    """
+    Retorna un cliente de Binance singleton SIN credenciales, para endpoints públicos.
+
+    Solo usar para market data (futures_mark_price, futures_orderbook_ticker,
+    futures_order_book, ...). Órdenes, posiciones y balances requieren
+    get_binance_client_for_user().
+
+    Returns:
+        Client: Cliente de Binance compartido (producción o testnet)
+    """
+    global _public_client
+
+    if _public_client is not None:
+        return _public_client
+
+    with _public_client_lock:
+        if _public_client is None:
+            if _USE_TESTNET:
+                client = Client(None, None, testnet=True)
+                client.API_URL = 'https://testnet.binancefuture.com'  # REST API
+                client.FUTURES_URL = 'https://testnet.binancefuture.com'  # Futures REST API
+            else:
+                client = Client(None, None)
+
+            # Pool más grande: el cliente se comparte entre threads de todos los usuarios
+            adapter = HTTPAdapter(pool_connections=PUBLIC_CLIENT_POOL_SIZE, pool_maxsize=PUBLIC_CLIENT_POOL_SIZE)
+            client.session.mount("https://", adapter)
+
+            _public_client = client
+            logger.info(f"🌐 Public Binance client initialized (pool_maxsize={PUBLIC_CLIENT_POOL_SIZE})")
+
+    return _public_client
@@ -3,13 +3,19 @@ Binance API fetch utilities with retry logic and request-level caching.
 
 This module provides resilient wrappers for Binance API calls with:
 - Automatic retries with exponential backoff for transient errors
+- Per-account circuit breaker on read calls that fails fast while Binance is down
 - Request-level caching to avoid duplicate API calls
 - Proper error handling and logging
 """
 import time
+import hashlib
+import inspect
 import logging
+import threading
+from functools import wraps
 import requests
-from typing import Dict, List, Optional, Any
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional, Any
 from contextvars import ContextVar
 
 _early_logger = logging.getLogger(__name__)
@@ -27,6 +33,16 @@ except ImportError:
     TENACITY_AVAILABLE = False
     _early_logger.warning("⚠️ tenacity not installed. Retry logic disabled. Install with: pip install tenacity")
 
+try:
+    from circuitbreaker import CircuitBreaker, CircuitBreakerError
+    CIRCUITBREAKER_AVAILABLE = True
+except ImportError:
+    CIRCUITBREAKER_AVAILABLE = False
+    _early_logger.warning("⚠️ circuitbreaker not installed. Circuit breaker disabled. Install with: pip install circuitbreaker")
+
+    class CircuitBreakerError(Exception):
+        pass
+
 try:
     from binance.exceptions import BinanceAPIException
 except ImportError:
@@ -43,9 +59,12 @@ BINANCE_URL = "https://api.binance.com/api/v3/klines"
 
 
 # ========== REQUEST-LEVEL CACHE ==========
-# Cache is reset on each new request (via middleware clearing)
-_position_cache: ContextVar[Dict] = ContextVar('position_cache', default={})
-_orders_cache: ContextVar[Dict] = ContextVar('orders_cache', default={})
+# Cache is reset on each new request (via middleware clearing).
+# Default is None (not a shared {}): outside a request there is no cache, so
+# background tasks/scripts never read positions cached by an unrelated caller.
+# The dict is mutated in place; set() is only called once per request.
+_position_cache: ContextVar[Optional[Dict]] = ContextVar('position_cache', default=None)
+_orders_cache: ContextVar[Optional[Dict]] = ContextVar('orders_cache', default=None)
 
 
 def clear_request_cache():
@@ -54,6 +73,44 @@ def clear_request_cache():
     _orders_cache.set({})
 
 
+# ========== IN-FLIGHT COALESCING ==========
+# Concurrent identical API calls (same kind/user/symbol) share a single request:
+# the first caller fetches, the rest wait on its Future.
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+# Max time a follower waits on the leader's fetch before issuing its own request
+_INFLIGHT_WAIT_SEC = 10
+
+
+def _fetch_coalesced(key: str, fetch: Callable, *args) -> Any:
+    """Run fetch(*args) once per key among overlapping callers and share the result (or error)."""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = _inflight[key] = Future()
+
+    if not is_leader:
+        try:
+            return future.result(timeout=_INFLIGHT_WAIT_SEC)
+        except FutureTimeoutError:
+            # Leader is stuck (e.g. hung socket): don't tie this caller to it
+            _early_logger.warning(f"⏳ In-flight fetch '{key}' exceeded {_INFLIGHT_WAIT_SEC}s - fetching directly")
+            return fetch(*args)
+
+    try:
+        result = fetch(*args)
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
 # ========== RETRY DECORATORS ==========
 
 if TENACITY_AVAILABLE:
@@ -78,9 +135,89 @@ else:
         return func
 
 
+# ========== CIRCUIT BREAKER (READ CALLS) ==========
+# One breaker per API key (the public client shares one): after BREAKER_FAILURE_THRESHOLD
+# consecutive calls that failed with an exchange-wide error (each one already retried),
+# that account's read calls raise CircuitBreakerError for BREAKER_RECOVERY_TIMEOUT seconds
+# instead of blocking worker threads through the full backoff.
+#
+# Only read calls are guarded: order creation/cancellation (SL/TP placement, emergency
+# closes) always reaches Binance.
+BREAKER_FAILURE_THRESHOLD = 10
+BREAKER_RECOVERY_TIMEOUT = 30
+
+# Binance codes that indicate exchange-side trouble (not a per-account problem like -1021/-1022)
+_EXCHANGE_WIDE_ERROR_CODES = frozenset({-1003})
+
+_breakers: Dict[str, "CircuitBreaker"] = {}
+_breakers_lock = threading.Lock()
+
+
+def _is_exchange_wide_failure(thrown_type, thrown_value) -> bool:
+    """Timeouts, connection errors, HTTP 5xx and rate limiting count towards opening the circuit."""
+    if isinstance(thrown_value, (requests.exceptions.Timeout, requests.exceptions.ConnectionError)):
+        return True
+
+    if isinstance(thrown_value, BinanceAPIException):
+        if thrown_value.code in _EXCHANGE_WIDE_ERROR_CODES:
+            return True
+        status_code = getattr(thrown_value, "status_code", None)
+        return isinstance(status_code, int) and status_code >= 500
+
+    return False
+
+
+def _breaker_label(client) -> str:
+    """Label for the client's breaker: hashed API key (never logged in clear) or 'public'."""
+    api_key = getattr(client, "API_KEY", None)
+    if not api_key:
+        return "public"
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+def _breaker_for(client) -> "CircuitBreaker":
+    label = _breaker_label(client)
+    breaker = _breakers.get(label)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(label)
+            if breaker is None:
+                breaker = _breakers[label] = CircuitBreaker(
+                    failure_threshold=BREAKER_FAILURE_THRESHOLD,
+                    recovery_timeout=BREAKER_RECOVERY_TIMEOUT,
+                    expected_exception=_is_exchange_wide_failure,
+                    name=f"binance_api:{label}"
+                )
+    return breaker
+
+
+def guarded_api_retry(func):
+    """
+    Decorator for read-only Binance API calls: retry logic + per-account circuit breaker.
+
+    The breaker wraps the retried call, so one failure = one call that exhausted its retries.
+    The decorated function must take a `client` argument (used to pick the breaker).
+    """
+    retried = api_retry(func)
+    if not CIRCUITBREAKER_AVAILABLE:
+        return retried
+
+    client_index = list(inspect.signature(func).parameters).index("client")
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        client = kwargs["client"] if "client" in kwargs else args[client_index]
+        breaker = _breaker_for(client)
+        if breaker.opened:
+            raise CircuitBreakerError(breaker)
+        return breaker.call(retried, *args, **kwargs)
+
+    return wrapper
+
+
 # ========== POSITION QUERIES WITH RETRY AND CACHE ==========
 
-@api_retry
+@guarded_api_retry
 def get_position_with_retry(symbol: str, client) -> List[Dict]:
     """
     Get position information from Binance with automatic retries.
@@ -119,20 +256,23 @@ def get_position_cached(symbol: str, client, user_id: str) -> List[Dict]:
         >>> pos2 = get_position_cached("BTCUSDT", client, "copy_trading")  # Returns cached
         >>> # pos1 and pos2 are the same object, only one API call made
     """
-    cache = _position_cache.get()
     key = f"{user_id}:{symbol.upper()}"
+    cache = _position_cache.get()
+    if cache is None:
+        # No request scope (no middleware): fetch without caching
+        return _fetch_coalesced(f"positions:{key}", get_position_with_retry, symbol, client)
 
-    if key not in cache:
-        positions = get_position_with_retry(symbol, client)
+    positions = cache.get(key)
+    if positions is None:
+        positions = _fetch_coalesced(f"positions:{key}", get_position_with_retry, symbol, client)
         cache[key] = positions
-        _position_cache.set(cache)
 
-    return cache[key]
+    return positions
 
 
 # ========== ORDER QUERIES WITH RETRY AND CACHE ==========
 
-@api_retry
+@guarded_api_retry
 def get_open_orders_with_retry(symbol: str, client) -> List[Dict]:
     """
     Get open orders from Binance with automatic retries.
@@ -162,20 +302,23 @@ def get_open_orders_cached(symbol: str, client, user_id: str) -> List[Dict]:
     Returns:
         List of open order dictionaries from Binance API (cached)
     """
-    cache = _orders_cache.get()
     key = f"{user_id}:{symbol.upper()}"
+    cache = _orders_cache.get()
+    if cache is None:
+        # No request scope (no middleware): fetch without caching
+        return _fetch_coalesced(f"orders:{key}", get_open_orders_with_retry, symbol, client)
 
-    if key not in cache:
-        orders = get_open_orders_with_retry(symbol, client)
+    orders = cache.get(key)
+    if orders is None:
+        orders = _fetch_coalesced(f"orders:{key}", get_open_orders_with_retry, symbol, client)
         cache[key] = orders
-        _orders_cache.set(cache)
 
-    return cache[key]
+    return orders
 
 
 # ========== ALGO ORDERS WITH RETRY ==========
 
-@api_retry
+@guarded_api_retry
 def get_algo_orders_with_retry(symbol: str, client) -> Dict[str, Any]:
     """
     Get Algo Orders (new Binance conditional order endpoint) with retries.
@@ -200,7 +343,7 @@ def get_algo_orders_with_retry(symbol: str, client) -> Dict[str, Any]:
 
 # ========== MARK PRICE WITH RETRY ==========
 
-@api_retry
+@guarded_api_retry
 def get_mark_price_with_retry(symbol: str, client) -> Dict[str, Any]:
     """
     Get mark price from Binance with automatic retries.
@@ -295,7 +438,7 @@ def cancel_algo_order_with_retry(symbol: str, algo_id: int, client) -> Dict[str,
 
 # ========== EXCHANGE INFO WITH RETRY ==========
 
-@api_retry
+@guarded_api_retry
 def get_exchange_info_with_retry(client) -> Dict[str, Any]:
     """
     Get exchange info from Binance with automatic retries.
@@ -347,5 +490,9 @@ def get_retry_info() -> Dict[str, Any]:
         "max_attempts": 3 if TENACITY_AVAILABLE else 1,
         "retry_strategy": "exponential_backoff" if TENACITY_AVAILABLE else "none",
         "min_wait_seconds": 1,
-        "max_wait_seconds": 10
+        "max_wait_seconds": 10,
+        "circuit_breaker_available": CIRCUITBREAKER_AVAILABLE,
+        "circuit_breaker_states": {label: breaker.state for label, breaker in list(_breakers.items())},
+        "circuit_breaker_failure_threshold": BREAKER_FAILURE_THRESHOLD,
+        "circuit_breaker_recovery_timeout": BREAKER_RECOVERY_TIMEOUT
     }
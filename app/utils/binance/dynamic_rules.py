@@ -1,8 +1,17 @@
 # app/utils/binance/dynamic_rules.py
 
 import json
+import os
+import threading
+import time
 import traceback
-from sqlalchemy import create_engine, text
+from bisect import bisect_left, bisect_right
+from operator import itemgetter
+from typing import Dict, List, Tuple
+from sqlalchemy import text
+
+# Engine compartido con query_executor (un solo pool de conexiones por proceso)
+from app.utils.db.query_executor import get_engine
 
 from app.utils.logger_config import get_logger
 logger = get_logger()
@@ -11,18 +20,93 @@ from app.utils.constants import (
     MAX_SLIPPAGE_PCT, MAX_SLIPPAGE, DEFAULT_MAX_SLIPPAGE_PCT,
     DEFAULT_MAX_SLIPPAGE, TABLE_CRYPTOS
 )
+from app.utils.binance.binance_cache_client import get_binance_cache_client
 # S3 cache removed - data fetched directly from Binance
 
-# Lazy initialization del engine (solo cuando se necesita consultar BD)
-_engine = None
+# Columna 7 de una kline: quote asset volume
+_quote_volume = itemgetter(7)
+
+# Tiers de liquidez parseados una sola vez (DEFAULT_LIQUIDITY_TIERS puede venir como JSON string)
+_TIERS = tuple(
+    json.loads(DEFAULT_LIQUIDITY_TIERS) if isinstance(DEFAULT_LIQUIDITY_TIERS, str) else DEFAULT_LIQUIDITY_TIERS
+)
+# Umbrales desempaquetados (vol, depth, min_depth_base, depth_pct): sin indexar dicts por tier en hot path
+_TIER_ROWS = tuple((t["vol"], t["depth"], t[MIN_DEPTH_BASE], t[DEPTH_PCT]) for t in _TIERS)
+
+# Cache en Redis del depth config calculado (reemplaza el antiguo cache en S3).
+# 0 desactiva el cache.
+DEPTH_CONFIG_CACHE_TTL = int(os.environ.get("DEPTH_CONFIG_CACHE_TTL", "300"))
+_DEPTH_CONFIG_KEY = "depth_cfg:"
+
+
+def _level_price(level) -> float:
+    return float(level[0])
+
+
+def _neg_level_price(level) -> float:
+    return -float(level[0])
+
+
+def _sum_depth(levels, min_price: float, max_price: float, descending: bool = False) -> float:
+    """
+    Notional (precio * cantidad) de los niveles [precio, cantidad] dentro de [min_price, max_price].
+
+    Binance devuelve los niveles ordenados (asks ascendente, bids descendente): la ventana de
+    precios se ubica con búsqueda binaria (O(log n) conversiones) y solo se suma ese tramo.
+    """
+    if not levels:
+        return 0.0
+    if descending:
+        start = bisect_left(levels, -max_price, key=_neg_level_price)
+        end = bisect_right(levels, -min_price, key=_neg_level_price)
+    else:
+        start = bisect_left(levels, min_price, key=_level_price)
+        end = bisect_right(levels, max_price, key=_level_price)
+    # La ventana ya está acotada: sin filtro, un solo float() por campo
+    _float = float
+    total = 0.0
+    for p, q in levels[start:end]:
+        total += _float(p) * _float(q)
+    return total
+
+
+def _compute_depth_config(symbol: str, klines, order_book: dict, mark_price: float) -> dict:
+    """Selecciona el tier de liquidez según volumen promedio (klines 1m) y profundidad ±0.5% del order book"""
+    total_quote_volume = sum(map(float, map(_quote_volume, klines)))
+    avg_quote_volume = total_quote_volume / 60
+
+    bids = order_book.get("bids", [])
+    asks = order_book.get("asks", [])
+
+    depth_pct_eval = 0.005
+    min_price = mark_price * (1 - depth_pct_eval)
+    max_price = mark_price * (1 + depth_pct_eval)
+
+    depth_usdt = (_sum_depth(bids, min_price, max_price, descending=True)
+                  + _sum_depth(asks, min_price, max_price))
+
+    for tier_vol, tier_depth, tier_min_depth_base, tier_depth_pct in _TIER_ROWS:
+        if avg_quote_volume > tier_vol and depth_usdt > tier_depth:
+            result = {MIN_DEPTH_BASE: tier_min_depth_base, DEPTH_PCT: tier_depth_pct}
+            logger.debug("✅ Dynamic depth config for %s: %s", symbol, result)
+            return result
+
+    return None
+
+
+def _store_depth_config(cache_client, symbol: str, result: dict):
+    """Guarda el depth config calculado en Redis (best effort)"""
+    if DEPTH_CONFIG_CACHE_TTL > 0:
+        try:
+            cache_client.redis_client.setex(_DEPTH_CONFIG_KEY + symbol.lower(), DEPTH_CONFIG_CACHE_TTL, json.dumps(result))
+        except Exception as e:
+            logger.warning(f"⚠️ Error guardando depth config en Redis para {symbol}: {e}")
+
 
-def get_engine():
-    """Inicializa el engine de SQLAlchemy solo cuando se necesita"""
-    global _engine
-    if _engine is None:
-        from app.utils.config.settings import get_database_url
-        _engine = create_engine(get_database_url(), echo=False, pool_pre_ping=True, future=True)
-    return _engine
+def _fallback_depth_config(symbol: str) -> dict:
+    fallback = {MIN_DEPTH_BASE: 2, DEPTH_PCT: 0.10}
+    logger.warning(f"⚠️ Using fallback depth config for {symbol}: {fallback}")
+    return fallback
 
 
 def adjust_base_depth_and_depth_pct_for_symbol(symbol, client, order_book, mark_price):
@@ -34,9 +118,19 @@ def adjust_base_depth_and_depth_pct_for_symbol(symbol, client, order_book, mark_
     Usa klines de Redis (crypto-data-redis) para evitar llamadas API innecesarias.
     """
     try:
-        # Intentar obtener klines desde Redis primero (crypto-data-redis)
-        from app.utils.binance.binance_cache_client import get_binance_cache_client
         cache_client = get_binance_cache_client()
+
+        if DEPTH_CONFIG_CACHE_TTL > 0:
+            try:
+                cached = cache_client.redis_client.get(_DEPTH_CONFIG_KEY + symbol.lower())
+                if cached:
+                    result = json.loads(cached)
+                    logger.debug("✅ Depth config cache HIT for %s: %s", symbol, result)
+                    return result
+            except Exception as e:
+                logger.warning(f"⚠️ Error leyendo depth config de Redis para {symbol}: {e}")
+
+        # Intentar obtener klines desde Redis primero (crypto-data-redis)
         klines = cache_client.get_klines_from_redis(symbol, interval="1m", limit=60)
 
         # Fallback a API si Redis no disponible
@@ -44,68 +138,110 @@ def adjust_base_depth_and_depth_pct_for_symbol(symbol, client, order_book, mark_
             logger.warning(f"⚠️ Klines not in Redis for {symbol}, falling back to API")
             klines = client.futures_klines(symbol=symbol, interval="1m", limit=60)
 
-        total_quote_volume = sum(float(k[7]) for k in klines)
-        avg_quote_volume = total_quote_volume / 60
+        result = _compute_depth_config(symbol, klines, order_book, mark_price)
+        if result is None:
+            return _fallback_depth_config(symbol)
 
-        bids = order_book.get("bids", [])
-        asks = order_book.get("asks", [])
+        _store_depth_config(cache_client, symbol, result)
+        return result
 
-        depth_pct_eval = 0.005
-        min_price = mark_price * (1 - depth_pct_eval)
-        max_price = mark_price * (1 + depth_pct_eval)
+    except Exception as e:
+        logger.error(f"❌ Error ajustando reglas dinámicas para {symbol}: {e}")
+        return {MIN_DEPTH_BASE: 2, DEPTH_PCT: 0.10}
 
-        def sum_depth(levels):
-            return sum(float(p) * float(q) for p, q in levels if min_price <= float(p) <= max_price)
 
-        depth_usdt = sum_depth(bids) + sum_depth(asks)
+# Cache en proceso de límites de slippage (config por símbolo que casi no cambia).
+# Este servicio no escribe en la tabla cryptos: los cambios en BD se ven al vencer el TTL.
+# Entradas: {symbol_lower: (monotonic_ts, limits)}
+SLIPPAGE_CACHE_TTL = float(os.environ.get("SLIPPAGE_CACHE_TTL", "300"))
+_SLIPPAGE_CACHE_MAXSIZE = 2048
 
-        # Usa tu variable global DEFAULT_LIQUIDITY_TIERS
-        tiers = DEFAULT_LIQUIDITY_TIERS
-        if isinstance(tiers, str):
-            try:
-                tiers = json.loads(tiers)
-            except:
-                tiers = DEFAULT_LIQUIDITY_TIERS
+# SQL compilado una sola vez (tabla fija; símbolos como parámetro array)
+_SLIPPAGE_SQL = text(f"""
+    SELECT symbol, max_slippage_pct, max_slippage
+    FROM {TABLE_CRYPTOS}
+    WHERE symbol = ANY(:symbols)
+""")
 
-        for tier in tiers:
-            if avg_quote_volume > tier["vol"] and depth_usdt > tier["depth"]:
-                result = {MIN_DEPTH_BASE: tier[MIN_DEPTH_BASE], DEPTH_PCT: tier[DEPTH_PCT]}
-                logger.debug(f"✅ Dynamic depth config for {symbol}: {result}")
-                return result
-
-        fallback = {MIN_DEPTH_BASE: 2, DEPTH_PCT: 0.10}
-        logger.warning(f"⚠️ Using fallback depth config for {symbol}: {fallback}")
-        return fallback
-
-    except Exception as e:
-        logger.error(f"❌ Error ajustando reglas dinámicas para {symbol}: {e}")
-        return {MIN_DEPTH_BASE: 2, DEPTH_PCT: 0.10}
+_slippage_cache: Dict[str, Tuple[float, dict]] = {}
+_slippage_lock = threading.RLock()
 
 
 def get_dynamic_slippage_limits(symbol: str) -> dict:
-    symbol = symbol.lower()
     """
     Retorna los límites de slippage para un símbolo desde la tabla 'cryptos'.
     Si no se encuentra, usa valores por defecto.
+    Resultado cacheado en proceso SLIPPAGE_CACHE_TTL segundos (tratar como solo lectura).
+    """
+    return get_dynamic_slippage_limits_bulk([symbol])[symbol]
+
+
+def get_dynamic_slippage_limits_bulk(symbols: List[str]) -> Dict[str, dict]:
     """
-    with get_engine().begin() as conn:
-        result = conn.execute(text(f"""
-            SELECT max_slippage_pct, max_slippage
-            FROM {TABLE_CRYPTOS}
-            WHERE symbol = :symbol
-        """), {"symbol": symbol}).fetchone()
-
-    if result:
-        max_slippage_pct = result[0] if result[0] is not None else DEFAULT_MAX_SLIPPAGE_PCT
-        max_slippage = result[1] if result[1] is not None else DEFAULT_MAX_SLIPPAGE
-        logger.debug(f"⚙️ Slippage configurado para {symbol}: pct={max_slippage_pct}, abs={max_slippage}")
-        return {
+    Límites de slippage para varios símbolos con UNA sola query (WHERE symbol = ANY(:symbols))
+    para los que no estén en cache. Símbolos sin fila en BD reciben los valores por defecto.
+
+    Args:
+        symbols: Lista de símbolos (cualquier casing)
+
+    Returns:
+        Dict {symbol (tal como se pasó): {MAX_SLIPPAGE_PCT, MAX_SLIPPAGE}}
+    """
+    results: Dict[str, dict] = {}
+    misses: Dict[str, List[str]] = {}  # symbol_lower -> símbolos originales que lo piden
+
+    now = time.monotonic()
+    with _slippage_lock:
+        for symbol in symbols:
+            sym_l = symbol.lower()
+            entry = _slippage_cache.get(sym_l)
+            if entry is not None and now - entry[0] < SLIPPAGE_CACHE_TTL:
+                results[symbol] = entry[1]
+            else:
+                misses.setdefault(sym_l, []).append(symbol)
+
+    if not misses:
+        return results
+
+    fetched = _fetch_slippage_limits(list(misses))
+
+    now = time.monotonic()
+    with _slippage_lock:
+        for sym_l, limits in fetched.items():
+            if len(_slippage_cache) >= _SLIPPAGE_CACHE_MAXSIZE and sym_l not in _slippage_cache:
+                # Desalojar la entrada más antigua (orden de inserción)
+                _slippage_cache.pop(next(iter(_slippage_cache)))
+            _slippage_cache[sym_l] = (now, limits)
+
+    for sym_l, originals in misses.items():
+        for symbol in originals:
+            results[symbol] = fetched[sym_l]
+
+    return results
+
+
+def _fetch_slippage_limits(symbols: List[str]) -> Dict[str, dict]:
+    """Consulta los límites de slippage en BD para varios símbolos (ya en minúsculas) en una query"""
+    # SELECT puro: AUTOCOMMIT evita el BEGIN/COMMIT implícito (sin round-trips extra ni
+    # conexiones "idle in transaction" en PgBouncer)
+    with get_engine().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        rows = conn.execute(_SLIPPAGE_SQL, {"symbols": symbols}).fetchall()
+
+    by_symbol = {row[0]: row for row in rows}
+    limits: Dict[str, dict] = {}
+    for symbol in symbols:
+        row = by_symbol.get(symbol)
+        if row is not None:
+            max_slippage_pct = row[1] if row[1] is not None else DEFAULT_MAX_SLIPPAGE_PCT
+            max_slippage = row[2] if row[2] is not None else DEFAULT_MAX_SLIPPAGE
+            logger.debug("⚙️ Slippage configurado para %s: pct=%s, abs=%s", symbol, max_slippage_pct, max_slippage)
+        else:
+            logger.warning(f"⚠️ No hay configuración de slippage en BD para {symbol}, usando default.")
+            max_slippage_pct = DEFAULT_MAX_SLIPPAGE_PCT
+            max_slippage = DEFAULT_MAX_SLIPPAGE
+        limits[symbol] = {
             MAX_SLIPPAGE_PCT: max_slippage_pct,
             MAX_SLIPPAGE: max_slippage
         }
-    else:
-        logger.warning(f"⚠️ No hay configuración de slippage en BD para {symbol}, usando default.")
-        return {
-            MAX_SLIPPAGE_PCT: DEFAULT_MAX_SLIPPAGE_PCT,
-            MAX_SLIPPAGE: DEFAULT_MAX_SLIPPAGE
-        }
+
+    return limits
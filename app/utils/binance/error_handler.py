@@ -40,6 +40,48 @@ BINANCE_ERROR_CODES = {
 }
 
 
+# Actionable suggestions attached to the error detail for specific codes
+_NOTIONAL_SUGGESTION = "Increase your position size or adjust the price to meet the minimum notional requirement (usually $5-10 USDT)"
+
+BINANCE_ERROR_SUGGESTIONS = {
+    # Insufficient margin
+    -2019: "Deposit more USDT to your Futures wallet or close other positions to free up margin",
+    # Notional value too small
+    -4001: _NOTIONAL_SUGGESTION,
+    -4061: _NOTIONAL_SUGGESTION,
+    -4164: _NOTIONAL_SUGGESTION,
+    # Price validation failed
+    -4131: "Ensure price is a multiple of the symbol's tickSize and within allowed price range",
+    # Stop price too close to mark
+    -4046: "Move your stop loss further from the current market price to avoid immediate trigger",
+    # Rate limit exceeded
+    -1003: "Wait 1 minute before retrying. Reduce request frequency to avoid rate limits",
+    # Timestamp issue
+    -1021: "Server time sync issue. Try again in a few seconds",
+}
+
+
+# Transient error codes that may succeed on retry
+RETRYABLE_ERROR_CODES = frozenset({
+    -1000,  # Unknown error (might be transient)
+    -1001,  # Internal server error
+    -1003,  # Rate limit (should retry with backoff)
+    -1021,  # Timestamp issue
+})
+
+
+# Per-code detail template: (friendly_message, http_status, trailing detail fields)
+_EMPTY_DETAIL_FIELDS = {}
+_ERROR_DETAIL_TEMPLATES = {
+    code: (
+        message,
+        status,
+        {"suggestion": BINANCE_ERROR_SUGGESTIONS[code]} if code in BINANCE_ERROR_SUGGESTIONS else _EMPTY_DETAIL_FIELDS
+    )
+    for code, (message, status) in BINANCE_ERROR_CODES.items()
+}
+
+
 def get_binance_error_message(error_code: int) -> Tuple[str, int]:
     """
     Get user-friendly error message and HTTP status code for a Binance error code.
@@ -55,8 +97,9 @@ def get_binance_error_message(error_code: int) -> Tuple[str, int]:
         >>> print(msg, status)
         ('Insufficient margin. Please add more funds to your account', 400)
     """
-    if error_code in BINANCE_ERROR_CODES:
-        return BINANCE_ERROR_CODES[error_code]
+    known = BINANCE_ERROR_CODES.get(error_code)
+    if known is not None:
+        return known
 
     # Default for unknown error codes
     return (f"Binance API error {error_code}", 500)
@@ -92,8 +135,11 @@ def handle_binance_exception(
     error_code = e.code
     binance_message = e.message
 
-    # Get user-friendly message and status code
-    friendly_message, status_code = get_binance_error_message(error_code)
+    # User-friendly message, status code and suggestion (if any) in one lookup
+    template = _ERROR_DETAIL_TEMPLATES.get(error_code)
+    if template is None:
+        template = (f"Binance API error {error_code}", 500, _EMPTY_DETAIL_FIELDS)
+    friendly_message, status_code, extra_fields = template
 
     # Build detailed error message
     context = f"{user_id}/{symbol}" if user_id and symbol else (user_id or symbol or "N/A")
@@ -103,34 +149,10 @@ def handle_binance_exception(
         "operation": operation,
         "context": context,
         "binance_code": error_code,
-        "binance_message": binance_message
+        "binance_message": binance_message,
+        **extra_fields
     }
 
-    # Customize message based on error code
-    if error_code == -2019:
-        # Insufficient margin - add helpful guidance
-        error_detail["suggestion"] = "Deposit more USDT to your Futures wallet or close other positions to free up margin"
-
-    elif error_code == -4001 or error_code == -4061 or error_code == -4164:
-        # Notional value too small
-        error_detail["suggestion"] = "Increase your position size or adjust the price to meet the minimum notional requirement (usually $5-10 USDT)"
-
-    elif error_code == -4131:
-        # Price validation failed
-        error_detail["suggestion"] = "Ensure price is a multiple of the symbol's tickSize and within allowed price range"
-
-    elif error_code == -4046:
-        # Stop price too close to mark
-        error_detail["suggestion"] = "Move your stop loss further from the current market price to avoid immediate trigger"
-
-    elif error_code == -1003:
-        # Rate limit exceeded
-        error_detail["suggestion"] = "Wait 1 minute before retrying. Reduce request frequency to avoid rate limits"
-
-    elif error_code == -1021:
-        # Timestamp issue
-        error_detail["suggestion"] = "Server time sync issue. Try again in a few seconds"
-
     return HTTPException(status_code=status_code, detail=error_detail)
 
 
@@ -153,15 +175,7 @@ def is_retryable_binance_error(error_code: int) -> bool:
         >>> is_retryable_binance_error(-2019)  # Insufficient margin
         False
     """
-    # Retryable errors
-    retryable_codes = {
-        -1000,  # Unknown error (might be transient)
-        -1001,  # Internal server error
-        -1003,  # Rate limit (should retry with backoff)
-        -1021,  # Timestamp issue
-    }
-
-    return error_code in retryable_codes
+    return error_code in RETRYABLE_ERROR_CODES
 
 
 def format_binance_error_for_logging(
@@ -5,6 +5,7 @@ Funciones:
   - create_market_order: Crear orden MARKET con reintentos
   - create_stop_loss_order: Crear SL via Algo Order API
   - create_take_profit_order: Crear TP via Algo Order API
+  - create_sl_tp_orders: Crear SL y TP en paralelo
   - emergency_close_position: Cierre de emergencia con múltiples estrategias
   - verify_position_closed: Verificar que posición está cerrada
   - execute_safe_trade: Crear MARKET + SL + TP con protección completa
@@ -14,8 +15,10 @@ USADO EN: trade_executor.py (versión nueva)
 
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 from app.utils.logger_config import get_logger
+from app.utils.binance.binance_fetch import cancel_algo_order_with_retry
 from app.utils.config.config_constants import BUY, SELL
 
 logger = get_logger()
@@ -161,6 +164,38 @@ def create_take_profit_order(
         return None
 
 
+def create_sl_tp_orders(
+    symbol: str,
+    close_direction: str,
+    stop_price: float,
+    target_price: float,
+    client,
+    user_id: str
+) -> tuple:
+    """
+    Crea SL y TP en paralelo (ambos Algo Orders independientes).
+
+    batchOrders no acepta órdenes condicionales (STOP_MARKET / TAKE_PROFIT_MARKET van por la
+    Algo Order API, que no tiene endpoint batch): se envían las dos requests a la vez, así la
+    fase de protección tarda ~1 RTT en lugar de 2.
+
+    Args:
+        symbol: Par de trading
+        close_direction: SELL para LONG, BUY para SHORT
+        stop_price: Precio de activación del SL
+        target_price: Precio de activación del TP
+        client: Cliente de Binance
+        user_id: ID del usuario
+
+    Returns:
+        tuple: (sl_result, tp_result), cada uno respuesta de Binance o None si falló
+    """
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="sl_tp") as executor:
+        sl_future = executor.submit(create_stop_loss_order, symbol, close_direction, stop_price, client, user_id)
+        tp_future = executor.submit(create_take_profit_order, symbol, close_direction, target_price, client, user_id)
+        return sl_future.result(), tp_future.result()
+
+
 def verify_position_closed(symbol: str, client, user_id: str) -> bool:
     """
     Verifica que una posición está cerrada.
@@ -304,8 +339,7 @@ def execute_safe_trade(
     Flujo:
       1. Crear orden MARKET
       2. Esperar FILLED (con protección de timeout)
-      3. Crear SL (si falla → cerrar posición)
-      4. Crear TP (si falla → cerrar posición)
+      3+4. Crear SL y TP en paralelo (si alguno falla → cerrar posición)
 
     Args:
         symbol: Par de trading
@@ -395,35 +429,64 @@ def execute_safe_trade(
                     "order_id": order_id
                 }
 
-        # ========== PASO 3: Crear Stop Loss ==========
+        # ========== PASO 3+4: Crear Stop Loss y Take Profit (en paralelo) ==========
         sl_direction = SELL if direction == BUY else BUY
-        sl_result = create_stop_loss_order(symbol, sl_direction, stop_loss, client, user_id)
+        sl_result, tp_result = create_sl_tp_orders(symbol, sl_direction, stop_loss, target_price, client, user_id)
 
         if not sl_result:
             logger.error(f"[{symbol}] SL falló. Cerrando posición ({user_id})")
             closed = emergency_close_position(symbol, direction, quantity, client, user_id)
+            orphan_cancelled = None
+            orphan_algo_id = tp_result.get("algoId") if tp_result else None
+            if closed and orphan_algo_id:
+                # El otro Algo Order (closePosition) quedaría huérfano y dispararía sobre un trade futuro.
+                # Si el cierre falló se conserva: es la única protección de la posición.
+                try:
+                    cancel_resp = cancel_algo_order_with_retry(symbol, orphan_algo_id, client)
+                    orphan_cancelled = bool(cancel_resp) and str(cancel_resp.get("code", "200")) == "200"
+                    if orphan_cancelled:
+                        logger.info(f"[{symbol}] TP huérfano {orphan_algo_id} cancelado ({user_id})")
+                    else:
+                        logger.error(f"[{symbol}] CRÍTICO: Binance no confirmó la cancelación del TP huérfano {orphan_algo_id} ({user_id}): {cancel_resp}")
+                except Exception as e:
+                    orphan_cancelled = False
+                    logger.error(f"[{symbol}] CRÍTICO: TP huérfano {orphan_algo_id} sigue activo, cancelar manualmente ({user_id}): {e}")
 
             return {
                 "success": False,
                 "step": "STOP_LOSS",
                 "error": "SL falló. Posición cerrada." if closed else "SL falló. CRÍTICO: No se pudo cerrar.",
                 "order_id": order_id,
-                "position_closed": closed
+                "position_closed": closed,
+                "orphan_cancelled": orphan_cancelled
             }
 
-        # ========== PASO 4: Crear Take Profit ==========
-        tp_result = create_take_profit_order(symbol, sl_direction, target_price, client, user_id)
-
         if not tp_result:
             logger.error(f"[{symbol}] TP falló. Cerrando posición ({user_id})")
             closed = emergency_close_position(symbol, direction, quantity, client, user_id)
+            orphan_cancelled = None
+            orphan_algo_id = sl_result.get("algoId") if sl_result else None
+            if closed and orphan_algo_id:
+                # El otro Algo Order (closePosition) quedaría huérfano y dispararía sobre un trade futuro.
+                # Si el cierre falló se conserva: es la única protección de la posición.
+                try:
+                    cancel_resp = cancel_algo_order_with_retry(symbol, orphan_algo_id, client)
+                    orphan_cancelled = bool(cancel_resp) and str(cancel_resp.get("code", "200")) == "200"
+                    if orphan_cancelled:
+                        logger.info(f"[{symbol}] SL huérfano {orphan_algo_id} cancelado ({user_id})")
+                    else:
+                        logger.error(f"[{symbol}] CRÍTICO: Binance no confirmó la cancelación del SL huérfano {orphan_algo_id} ({user_id}): {cancel_resp}")
+                except Exception as e:
+                    orphan_cancelled = False
+                    logger.error(f"[{symbol}] CRÍTICO: SL huérfano {orphan_algo_id} sigue activo, cancelar manualmente ({user_id}): {e}")
 
             return {
                 "success": False,
                 "step": "TAKE_PROFIT",
                 "error": "TP falló. Posición cerrada." if closed else "TP falló. CRÍTICO: No se pudo cerrar.",
                 "order_id": order_id,
-                "position_closed": closed
+                "position_closed": closed,
+                "orphan_cancelled": orphan_cancelled
             }
 
         # ========== TODO OK ==========
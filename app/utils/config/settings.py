@@ -46,4 +46,26 @@ def get_database_url() -> str:
         raise RuntimeError("❌ La variable DATABASE_URL_CRYPTO_TRADER no está definida.")
     return url
 
+_TRUE_STRINGS = frozenset({"true", "1", "yes", "on"})
+
+
+def get_database_engine_options() -> dict:
+    """
+    Opciones de pool para create_engine, configurables por entorno.
+    En despliegues con PgBouncer (transaction pooling) usar DB_POOL_PRE_PING=false.
+
+    Los defaults son conservadores porque el pool es por proceso: con N workers
+    preforkeados el máximo es N * (DB_POOL_SIZE + DB_MAX_OVERFLOW) conexiones contra
+    max_connections de Postgres. Subirlos por entorno solo si el servidor lo soporta.
+    """
+    return {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+        # LIFO: reusa la conexión más reciente; las de overflow quedan ociosas y se reciclan
+        "pool_use_lifo": True,
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "true").lower() in _TRUE_STRINGS,
+    }
+
 # S3 and SNS functions removed - not needed in REST API version
\ No newline at end of file
@@ -22,10 +22,24 @@ def get_engine():
     """Inicializa el engine de SQLAlchemy solo cuando se necesita"""
     global _engine
     if _engine is None:
-        from app.utils.config.settings import get_database_url
-        _engine = create_engine(get_database_url(), echo=False, pool_pre_ping=True, future=True)
+        from app.utils.config.settings import get_database_url, get_database_engine_options
+        _engine = create_engine(get_database_url(), echo=False, future=True, **get_database_engine_options())
     return _engine
 
+
+def _reset_engine_after_fork():
+    """
+    En el proceso hijo tras un fork (workers preforked): descarta el pool heredado sin cerrar
+    las conexiones del padre (close=False), así cada worker abre sus propias conexiones.
+    """
+    if _engine is not None:
+        _engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_engine_after_fork)
+
+
 def get_rules(user_id: str, strategy: str) -> dict:
     """
     Devuelve las reglas configurables desde PostgreSQL.
@@ -31,7 +31,7 @@ class RedisCircuitBreaker:
 
     def call(self, func, *args, **kwargs):
         if self.state == 'OPEN':
-            if time.time() - self.last_failure_time > self.timeout:
+            if time.monotonic() - self.last_failure_time > self.timeout:
                 self.state = 'HALF_OPEN'
                 logger.info("🔄 Circuit breaker: Attempting half-open state")
             else:
@@ -53,7 +53,7 @@ class RedisCircuitBreaker:
 
     def _on_failure(self):
         self.failure_count += 1
-        self.last_failure_time = time.time()
+        self.last_failure_time = time.monotonic()  # Reloj monotónico: el timeout no depende de ajustes NTP
 
         if self.failure_count >= self.failure_threshold:
             self.state = 'OPEN'
@@ -78,7 +78,9 @@ class ResilientRedisClient:
             'socket_connect_timeout': 3,
             'retry_on_timeout': True,
             'health_check_interval': 30,
-            'max_connections': 10
+            # redis-py ya hace checkout de una conexión del pool por comando (thread-safe);
+            # el límite real de concurrencia es el tamaño del pool: al agotarse lanza ConnectionError
+            'max_connections': redis_kwargs.get('max_connections', int(os.getenv('REDIS_MAX_CONNECTIONS', 32)))
         }
 
         self._client = None
@@ -143,6 +145,12 @@ class ResilientRedisClient:
             return None
         return self._execute_with_retry(self._client.get, key)
 
+    def mget(self, keys):
+        """Get multiple keys in a single round trip (values in the same order, None if missing)"""
+        if not keys:
+            return []
+        return self._execute_with_retry(self._client.mget, keys)
+
     def set(self, key, value, ex=None):
         if value is None:
             logger.warning(f"⚠️ Attempted to set None value for key: {key}")
@@ -242,6 +250,7 @@ def get_redis_client():
         REDIS_PORT: Puerto del servidor Redis (default: 6379)
         REDIS_DB: Base de datos de Redis (default: 0)
         REDIS_PASSWORD: Password de Redis (opcional)
+        REDIS_MAX_CONNECTIONS: Tamaño del pool de conexiones (default: 32)
 
     Returns:
         ResilientRedisClient: Cliente Redis robusto, o None si falla
@@ -191,10 +191,11 @@ class UserRiskProfileValidator:
         can_trade, limit_reason, limit_info = check_trade_limit(
             self.user_id, self.rules, symbol
         )
+        # Se guarda siempre para que el caller pueda loguear el estado sin volver a consultar Binance
+        validation_results["limit_info"] = limit_info
 
         if not can_trade:
             validation_results["failed_at"] = "trade_limits"
-            validation_results["limit_info"] = limit_info
             return False, f"TRADE_LIMIT: {limit_reason}", validation_results
 
         # ═══════════════════════════════════════════════════════════════
@@ -8,6 +8,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import json
 import time
 import uuid
+from contextlib import asynccontextmanager
 from contextvars import ContextVar
 from datetime import datetime, timezone, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -29,11 +30,12 @@ from app.futures import (
     cancel_tp_only,     # NEW: Cancel only TP orders
 )
 from app.multi_user_execution import execute_multi_user_guardian_action
-from app.market_validation import get_fresh_market_data, validate_guardian_decision_freshness, should_proceed_with_execution
-from app.trade_limits import check_trade_limit, log_trade_limit_status, get_trade_limit_summary
+from app.market_validation import get_fresh_market_data, validate_guardian_decision_freshness
+from app.trade_limits import check_trade_limit, log_trade_limit_status, limit_info_to_summary, get_trade_limit_summary, invalidate_user_cache
 
 from app.utils.db.query_executor import get_rules, is_symbol_banned
-from app.utils.binance.binance_client import get_binance_client_for_user
+from app.utils.binance.binance_client import get_binance_client_for_user, get_public_binance_client
+from app.utils.binance.binance_cache_client import start_metadata_refresher
 from app.utils.config.settings import (
     COPY_TRADING, FUTURES, HUFSA, COPY_2
 )
@@ -72,13 +74,23 @@ else:
 
 STRATEGY = "archer_model"
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Precarga exchange_info y lo refresca en background (los requests no esperan a la API).
+    El cliente de Binance se crea dentro del thread: si Binance no responde, el arranque no falla."""
+    start_metadata_refresher(get_public_binance_client)
+    yield
+
+
 # FastAPI app
 app = FastAPI(
     title="crypto-listener-rest",
     description="REST API for immediate crypto trade execution",
-    version="1.1.0"  # Updated for improved endpoints
+    version="1.1.0",  # Updated for improved endpoints
+    lifespan=lifespan
 )
 
+
 # ========== REQUEST ID MIDDLEWARE (Structured Logging) ==========
 request_id_var: ContextVar[str] = ContextVar('request_id', default=None)
 
@@ -360,14 +372,9 @@ def process_user_trade(user_id: str, message: dict, strategy: str) -> dict:
             logger.info(f"{log_prefix} Trade REJECTED: {reason}")
 
             # Log información adicional según el tipo de rechazo
-            if validation_data.get("current_count") is not None:
-                current_count = validation_data.get("current_count", 0)
-                max_allowed = validation_data.get("max_allowed", 0)
-                logger.info(f"{log_prefix}    Current: {current_count}/{max_allowed} trades open")
-
-                if validation_data.get("current_symbols"):
-                    symbols_str = ', '.join(validation_data["current_symbols"])
-                    logger.info(f"{log_prefix}    Open positions: {symbols_str}")
+            limit_summary = limit_info_to_summary(user_id, rules, validation_data.get("limit_info"))
+            if limit_summary is not None:
+                log_trade_limit_status(user_id, rules, symbol, summary=limit_summary)
 
             if validation_data.get("daily_loss_pct") is not None:
                 daily_loss = validation_data.get("daily_loss_pct", 0)
@@ -393,10 +400,11 @@ def process_user_trade(user_id: str, message: dict, strategy: str) -> dict:
         logger.info(f"{log_prefix} ALL VALIDATIONS PASSED")
         logger.info(f"{log_prefix} Capital multiplier: {capital_multiplier:.3f}x ({sqs_grade})")
 
-        # Log remaining slots if limits are configured
-        if validation_data.get("max_allowed", 999) < 999:
-            remaining = validation_data.get("max_allowed", 0) - validation_data.get("current_count", 0)
-            logger.info(f"{log_prefix} Trade slots: {remaining} remaining")
+        # Log remaining slots if limits are configured (reusa el conteo de la validación)
+        limit_summary = limit_info_to_summary(user_id, rules, validation_data.get("limit_info"))
+        if limit_summary is not None:
+            log_trade_limit_status(user_id, rules, symbol, summary=limit_summary)
+            logger.info(f"{log_prefix} Trade slots: {limit_summary['remaining_slots']} remaining")
 
         # Crear el trade
         client = get_binance_client_for_user(user_id)
@@ -405,11 +413,15 @@ def process_user_trade(user_id: str, message: dict, strategy: str) -> dict:
         # 🧪 TEST MODE: Preparar leverage específico para test
         leverage_override = test_leverage if (is_test and test_users_list and user_id in test_users_list and test_leverage) else None
 
-        order = create_trade(
-            symbol, entry_price, stop_loss, target_price, direction,
-            rr, probability, rules, client, user_id, strategy,
-            signal_quality_score, capital_multiplier, leverage_override
-        )
+        try:
+            order = create_trade(
+                symbol, entry_price, stop_loss, target_price, direction,
+                rr, probability, rules, client, user_id, strategy,
+                signal_quality_score, capital_multiplier, leverage_override
+            )
+        finally:
+            # Posiciones/órdenes pudieron cambiar (aun si create_trade falló a mitad): descartar cache de límites
+            invalidate_user_cache(user_id)
 
         if order is not None and order.get("success"):
             logger.info(f"{log_prefix} Trade exitoso")
@@ -462,7 +474,7 @@ async def execute_trade(trade: TradeRequest) -> JSONResponse:
 
     Procesa de forma síncrona sin cola - si falla, falla inmediatamente.
     """
-    start_time = time.time()
+    start_time = time.monotonic()
 
     logger.info(f"Trade request received: {trade.symbol} {trade.trade} @ {trade.entry}")
 
@@ -533,7 +545,7 @@ async def execute_trade(trade: TradeRequest) -> JSONResponse:
     # Log summary
     successful = sum(1 for r in results if r.get("success"))
     failed = len(results) - successful
-    execution_time = time.time() - start_time
+    execution_time = time.monotonic() - start_time
 
     logger.info(f"Trade processing complete: {successful} successful, {failed} failed in {execution_time:.3f}s")
 
@@ -617,7 +629,7 @@ async def get_stats():
         for user_id in USERS:
             try:
                 rules = get_rules(user_id, STRATEGY)
-                summary = get_trade_limit_summary(user_id, rules)
+                summary = get_trade_limit_summary(user_id, rules, fetch_when_unlimited=True)
                 stats[user_id] = summary
             except Exception as e:
                 stats[user_id] = {"error": str(e)}
@@ -662,12 +674,15 @@ async def close_position(request: ClosePositionRequest):
         client = get_binance_client_for_user(user_id)
 
         # Close position and cancel orders
-        result = close_position_and_cancel_orders(
-            symbol=symbol,
-            client=client,
-            user_id=user_id,
-            strategy=STRATEGY
-        )
+        try:
+            result = close_position_and_cancel_orders(
+                symbol=symbol,
+                client=client,
+                user_id=user_id,
+                strategy=STRATEGY
+            )
+        finally:
+            invalidate_user_cache(user_id)
 
         if result.get("success"):
             logger.info(f"✅ Position closed successfully: {user_id}/{symbol}")
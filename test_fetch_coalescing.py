@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests del coalescing de fetches en vuelo de binance_fetch._fetch_coalesced
+(sin llamadas reales a Binance).
+
+Ejecutar: python -m pytest -q test_fetch_coalescing.py
+"""
+
+import threading
+
+import pytest
+
+import app.utils.binance.binance_fetch as binance_fetch
+
+
+def run_in_thread(fn, *args):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(fn(*args)))
+    thread.start()
+    return thread, results
+
+
+def test_follower_wait_is_bounded_to_ten_seconds():
+    assert binance_fetch._INFLIGHT_WAIT_SEC == 10
+
+
+def test_followers_share_the_leader_result():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch(symbol):
+        calls.append(symbol)
+        started.set()
+        release.wait(timeout=5)
+        return [{"symbol": symbol}]
+
+    leader, leader_results = run_in_thread(binance_fetch._fetch_coalesced, "positions:share", fetch, "BTCUSDT")
+    assert started.wait(timeout=5)
+    follower, follower_results = run_in_thread(binance_fetch._fetch_coalesced, "positions:share", fetch, "BTCUSDT")
+
+    release.set()
+    leader.join(timeout=5)
+    follower.join(timeout=5)
+
+    assert calls == ["BTCUSDT"]
+    assert leader_results == follower_results == [[{"symbol": "BTCUSDT"}]]
+
+
+def test_follower_propagates_leader_error():
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing_fetch():
+        started.set()
+        release.wait(timeout=5)
+        raise ConnectionError("binance down")
+
+    errors = []
+
+    def leader_call():
+        try:
+            binance_fetch._fetch_coalesced("orders:error", failing_fetch)
+        except ConnectionError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=leader_call)
+    leader.start()
+    assert started.wait(timeout=5)
+
+    follower_errors = []
+
+    def follower_call():
+        try:
+            binance_fetch._fetch_coalesced("orders:error", failing_fetch)
+        except ConnectionError as e:
+            follower_errors.append(e)
+
+    follower = threading.Thread(target=follower_call)
+    follower.start()
+    release.set()
+    leader.join(timeout=5)
+    follower.join(timeout=5)
+
+    assert len(errors) == 1
+    assert len(follower_errors) == 1
+
+
+def test_follower_falls_back_to_own_fetch_when_leader_hangs(monkeypatch):
+    # Ventana corta para el test; en producción es _INFLIGHT_WAIT_SEC (10s)
+    monkeypatch.setattr(binance_fetch, "_INFLIGHT_WAIT_SEC", 0.1)
+    leader_started = threading.Event()
+    release_leader = threading.Event()
+    calls = []
+
+    def fetch(tag):
+        calls.append(tag)
+        if len(calls) == 1:
+            leader_started.set()
+            release_leader.wait(timeout=5)
+            return "leader"
+        return "own_fetch"
+
+    leader, leader_results = run_in_thread(binance_fetch._fetch_coalesced, "positions:hang", fetch, "x")
+    assert leader_started.wait(timeout=5)
+
+    try:
+        # El follower no queda atado al leader colgado: hace su propio request
+        assert binance_fetch._fetch_coalesced("positions:hang", fetch, "x") == "own_fetch"
+        assert len(calls) == 2
+    finally:
+        release_leader.set()
+        leader.join(timeout=5)
+
+    assert leader_results == ["leader"]
+    assert "positions:hang" not in binance_fetch._inflight
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests del cache de posiciones/órdenes de trade_limits (sin llamadas reales a Binance).
+Cubren la carrera invalidación vs. refill: un fetch que empezó antes de
+invalidate_user_cache no puede volver a poblar el cache con datos viejos.
+
+Ejecutar: python -m pytest -q test_trade_limits_cache.py
+"""
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+import app.trade_limits as trade_limits
+
+USER_ID = "test_user"
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    trade_limits.invalidate_user_cache(USER_ID)
+    yield
+    trade_limits.invalidate_user_cache(USER_ID)
+
+
+def positions_payload(*symbols):
+    return [{"symbol": s, "positionAmt": "1"} for s in symbols]
+
+
+def blocking_client(payload):
+    """Cliente cuyo futures_position_information se bloquea hasta que el test lo libera"""
+    started = threading.Event()
+    release = threading.Event()
+
+    def position_information():
+        started.set()
+        release.wait(timeout=5)
+        return payload
+
+    client = MagicMock()
+    client.futures_position_information.side_effect = position_information
+    return client, started, release
+
+
+def test_fetch_result_is_cached():
+    client = MagicMock()
+    client.futures_position_information.return_value = positions_payload("btcusdt")
+
+    first = trade_limits.get_open_positions_count(USER_ID, client)
+    second = trade_limits.get_open_positions_count(USER_ID, client)
+
+    assert first == (1, ["BTCUSDT"], frozenset({"BTCUSDT"}))
+    assert second == first
+    assert client.futures_position_information.call_count == 1
+
+
+def test_stale_refill_after_invalidation_is_dropped():
+    client, started, release = blocking_client(positions_payload("btcusdt"))
+    results = []
+    fetch = threading.Thread(target=lambda: results.append(trade_limits.get_open_positions_count(USER_ID, client)))
+    fetch.start()
+    assert started.wait(timeout=5)
+
+    # El trade se abre/cierra mientras el fetch está en vuelo
+    trade_limits.invalidate_user_cache(USER_ID)
+    release.set()
+    fetch.join(timeout=5)
+
+    # El caller recibe su resultado, pero no queda en cache
+    assert results == [(1, ["BTCUSDT"], frozenset({"BTCUSDT"}))]
+    assert trade_limits._cache_get(trade_limits._POS_CACHE, USER_ID) is None
+
+
+def test_stale_refill_does_not_overwrite_newer_value():
+    stale_client, stale_started, stale_release = blocking_client(positions_payload("btcusdt"))
+    stale_fetch = threading.Thread(target=trade_limits.get_open_positions_count, args=(USER_ID, stale_client))
+    stale_fetch.start()
+    assert stale_started.wait(timeout=5)
+
+    trade_limits.invalidate_user_cache(USER_ID)
+
+    # Fetch posterior a la invalidación: su valor es el vigente
+    fresh_client = MagicMock()
+    fresh_client.futures_position_information.return_value = positions_payload("btcusdt", "ethusdt")
+    fresh = trade_limits.get_open_positions_count(USER_ID, fresh_client)
+    assert fresh[0] == 2
+
+    # El fetch viejo termina después y no debe pisar el valor nuevo
+    stale_release.set()
+    stale_fetch.join(timeout=5)
+
+    assert trade_limits._cache_get(trade_limits._POS_CACHE, USER_ID) == fresh
+
+
+def test_invalidation_clears_orders_cache_too():
+    client = MagicMock()
+    client.futures_get_open_orders.return_value = [{"symbol": "solusdt"}]
+    trade_limits.get_open_orders_count(USER_ID, client)
+    assert trade_limits._cache_get(trade_limits._ORD_CACHE, USER_ID) is not None
+
+    trade_limits.invalidate_user_cache(USER_ID)
+
+    assert trade_limits._cache_get(trade_limits._ORD_CACHE, USER_ID) is None
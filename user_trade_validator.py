@@ -357,6 +357,8 @@ class UserTradeValidator:
         1. Verificar si ya existe posición para el símbolo
         2. Verificar si se alcanzó el máximo de trades (si está configurado)
 
+        Sin límite configurado solo se consulta la posición del símbolo.
+
         Args:
             max_trades: Máximo de trades permitidos (999 = sin límite)
             symbol: Símbolo del trade a abrir
@@ -365,6 +367,14 @@ class UserTradeValidator:
             Tuple[bool, str]: (permitido, razón)
         """
         try:
+            if max_trades >= 999:
+                # Sin límite: solo importa si existe posición en este símbolo.
+                # positionRisk filtrado por símbolo (payload de 1 fila en lugar de todo el universo)
+                positions = self.client.futures_position_information(symbol=symbol.upper())
+                if any(abs(float(pos.get("positionAmt", "0"))) > 0 for pos in positions):
+                    return False, f"position_exists:{symbol}"
+                return True, ""
+
             # Obtener todas las posiciones de Binance (una sola llamada)
             positions = self.client.futures_position_information()
 
@@ -376,7 +386,8 @@ class UserTradeValidator:
             ]
 
             # 1. Verificar si ya existe posición para este símbolo
-            if symbol.upper() in [s.upper() for s in open_positions]:
+            symbol_upper = symbol.upper()
+            if any(s.upper() == symbol_upper for s in open_positions):
                 return False, f"position_exists:{symbol}"
 
             # 2. Verificar límite de trades (solo si está configurado)